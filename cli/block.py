@@ -14,22 +14,27 @@ Usage:
     block unblock gmail -w 0      # Advanced: no wait
 """
 
-import argparse
+import mmap
 import sys
 import os
-from datetime import datetime
-from pathlib import Path
-import subprocess
+import time
+from itertools import chain
+from types import SimpleNamespace
 
 # Add cli directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 import db
+from common import format_time_remaining, get_frontmost_context, url_matches_domains
 
 # Constants
 HOSTS_PATH = "/etc/hosts"
 BLOCKER_START = "# BLOCKER START"
 BLOCKER_END = "# BLOCKER END"
-CONFIG_FILE_DEFAULT = str(Path(__file__).resolve().parent.parent / "config.txt")
+DAEMON_LABEL = "com.taviblock.daemon"
+DAEMON_PLIST = "/Library/LaunchDaemons/com.taviblock.daemon.plist"
+DAEMON_PID_PATH = "/var/run/taviblock.pid"
+BYPASS_COOLDOWN_MINUTES = 60  # Bypass can be used once per hour
+CONFIG_FILE_DEFAULT = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "config.txt")
 
 
 def require_admin():
@@ -39,140 +44,116 @@ def require_admin():
         sys.exit(1)
 
 
-def read_config(config_file):
-    """Read the config file and return a list of domains to block."""
-    if not os.path.exists(config_file):
+# Parsed config cache: path -> (mtime_ns, size, domains, sections)
+_CONFIG_CACHE = {}
+
+
+def _load_config(config_file):
+    """Parse the config file once, returning (domains, sections).
+
+    Results are cached by path and invalidated when the file's mtime or
+    size changes.
+    """
+    try:
+        st = os.stat(config_file)
+        cached = _CONFIG_CACHE.get(config_file)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2], cached[3]
+        f = open(config_file, "rb")
+    except FileNotFoundError:
         print(f"Config file {config_file} does not exist.")
         sys.exit(1)
+
     domains = []
-    with open(config_file, "r") as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith("#"):
-                if line.startswith('[') and line.endswith(']'):
-                    continue
-                domains.append(line)
-    return domains
+    current_section = "default"
+    sections = {current_section: []}
+    with f:
+        # mmap cannot map an empty file
+        if st.st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for raw in iter(mm.readline, b""):
+                    line = raw.decode().strip()
+                    if not line or line[0] == "#":
+                        continue
+                    if line[0] == "[" and line[-1] == "]":
+                        current_section = line[1:-1].strip()
+                        sections.setdefault(current_section, [])
+                    else:
+                        domains.append(line)
+                        sections[current_section].append(line)
+
+    sections = {name: frozenset(values) for name, values in sections.items()}
+    _CONFIG_CACHE[config_file] = (st.st_mtime_ns, st.st_size, domains, sections)
+    return domains, sections
+
+
+def read_config(config_file):
+    """Read the config file and return a list of domains to block."""
+    return _load_config(config_file)[0]
 
 
 def read_config_sections(config_file):
-    """Read config file and return dictionary of sections to domains."""
-    sections = {}
-    current_section = "default"
-    sections[current_section] = []
-    with open(config_file, "r") as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-            if line.startswith("[") and line.endswith("]"):
-                current_section = line[1:-1].strip()
-                if current_section not in sections:
-                    sections[current_section] = []
-            else:
-                sections[current_section].append(line)
-    return sections
-
-
-def generate_block_entries(domains):
-    """Generate hosts file entries for IPv4 and IPv6."""
-    entries = []
-    common_subdomains = ["www", "m", "mobile", "login", "app", "api"]
-
-    for domain in domains:
-        domain = domain.strip()
-        if not domain:
-            continue
-        parts = domain.split(".")
-        if len(parts) == 2:  # root domain
-            entries.append(f"127.0.0.1 {domain}")
-            entries.append(f"::1 {domain}")
-            for prefix in common_subdomains:
-                subdomain = f"{prefix}.{domain}"
-                entries.append(f"127.0.0.1 {subdomain}")
-                entries.append(f"::1 {subdomain}")
-        else:
-            entries.append(f"127.0.0.1 {domain}")
-            entries.append(f"::1 {domain}")
-    return entries
-
-
-def is_ultra_distracting(domain, sections):
-    """Check if a domain is in the ultra_distracting section."""
-    if 'ultra_distracting' in sections:
-        return domain in sections['ultra_distracting']
-    return False
-
-
-def format_time_remaining(seconds):
-    """Format seconds into human-readable time."""
-    if seconds < 60:
-        return f"{int(seconds)} seconds"
-    elif seconds <= 300:  # 5 minutes or less, show minutes and seconds
-        minutes = int(seconds / 60)
-        secs = int(seconds % 60)
-        if secs > 0:
-            return f"{minutes} minute{'s' if minutes != 1 else ''} {secs} second{'s' if secs != 1 else ''}"
-        else:
-            return f"{minutes} minute{'s' if minutes != 1 else ''}"
-    elif seconds < 3600:
-        minutes = int(seconds / 60)
-        return f"{minutes} minute{'s' if minutes != 1 else ''}"
-    else:
-        hours = int(seconds / 3600)
-        minutes = int((seconds % 3600) / 60)
-        if minutes > 0:
-            return f"{hours} hour{'s' if hours != 1 else ''} {minutes} minute{'s' if minutes != 1 else ''}"
-        return f"{hours} hour{'s' if hours != 1 else ''}"
+    """Read config file and return dictionary of sections to domain frozensets."""
+    return _load_config(config_file)[1]
 
 
-def cmd_status(args):
-    """Show current status."""
-    active_sessions = db.get_active_sessions()
-    pending_sessions = db.get_pending_sessions()
+def cmd_status(args, active_sessions=None, pending_sessions=None):
+    """Show current status.
+
+    Callers that have already queried the sessions can pass them in to
+    skip the database round-trip.
+    """
+    now_ts = time.time()
+    if active_sessions is None or pending_sessions is None:
+        active_sessions, pending_sessions = db.get_live_sessions()
     
     if not active_sessions and not pending_sessions:
         print("All domains are blocked")
         return
     
+    # Collect the report and emit it with a single write
+    out = []
+    
     if pending_sessions:
-        print("PENDING SESSIONS:")
+        out.append("PENDING SESSIONS:")
         for session in pending_sessions:
-            wait_remaining = session['wait_until'] - datetime.now().timestamp()
-            print(f"  [{session['id']}] {session['session_type']}:")
+            wait_remaining = session['wait_until'] - now_ts
+            out.append(f"  [{session['id']}] {session['session_type']}:")
             if session['session_type'] == 'bypass':
-                print(f"    Domains: all")
+                out.append(f"    Domains: all")
             else:
-                print(f"    Domains: {', '.join(session['domains'])}")
-            print(f"    Starts in: {format_time_remaining(wait_remaining)}")
-            print(f"    Duration: {format_time_remaining(session['end_time'] - session['wait_until'])}")
-        print()
+                out.append(f"    Domains: {', '.join(session['domains'])}")
+            out.append(f"    Starts in: {format_time_remaining(wait_remaining)}")
+            out.append(f"    Duration: {format_time_remaining(session['end_time'] - session['wait_until'])}")
+        out.append("")
     
     if active_sessions:
-        print("ACTIVE SESSIONS:")
+        out.append("ACTIVE SESSIONS:")
         for session in active_sessions:
-            remaining = session['end_time'] - datetime.now().timestamp()
-            print(f"  [{session['id']}] {session['session_type']}:")
+            remaining = session['end_time'] - now_ts
+            out.append(f"  [{session['id']}] {session['session_type']}:")
             if session['session_type'] == 'bypass':
-                print(f"    Domains: all")
+                out.append(f"    Domains: all")
             else:
-                print(f"    Domains: {', '.join(session['domains'])}")
-            print(f"    Remaining: {format_time_remaining(remaining)}")
+                out.append(f"    Domains: {', '.join(session['domains'])}")
+            out.append(f"    Remaining: {format_time_remaining(remaining)}")
             if session['session_type'] == 'bypass':
-                print(f"    Note: Bypass sessions cannot be extended")
-        print()
+                out.append(f"    Note: Bypass sessions cannot be extended")
+        out.append("")
         
         all_unblocked = db.get_all_unblocked_domains()
         # Check if any active session is a bypass
         has_bypass = any(s['session_type'] == 'bypass' for s in active_sessions)
         if has_bypass:
-            print(f"Currently unblocked: all (bypass active)")
+            out.append(f"Currently unblocked: all (bypass active)")
         else:
-            print(f"Currently unblocked: {', '.join(sorted(all_unblocked))}")
+            out.append(f"Currently unblocked: {', '.join(all_unblocked)}")
     
-    available, remaining = db.check_bypass_cooldown()
+    available, remaining = db.check_profile_cooldown('bypass', BYPASS_COOLDOWN_MINUTES)
     if not available:
-        print(f"\nBypass cooldown: {format_time_remaining(remaining)} remaining")
+        out.append(f"\nBypass cooldown: {format_time_remaining(remaining)} remaining")
+    
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 def cmd_unblock(args, targets=None):
@@ -180,8 +161,8 @@ def cmd_unblock(args, targets=None):
     if targets is None:
         targets = args.targets
         
-    sections = read_config_sections(args.config)
-    domains_list = read_config(args.config)
+    domains_list, sections = _load_config(args.config)
+    domains_set = frozenset(domains_list)
     
     # Process targets
     all_domains = set()
@@ -190,14 +171,14 @@ def cmd_unblock(args, targets=None):
         
         # Check sections
         if target in sections:
-            all_domains.update(sections[target])
+            all_domains |= sections[target]
         elif not target.endswith('.com') and (target + '.com') in sections:
             target = target + '.com'
-            all_domains.update(sections[target])
+            all_domains |= sections[target]
         # Check single domains
-        elif target in domains_list:
+        elif target in domains_set:
             all_domains.add(target)
-        elif not target.endswith('.com') and (target + '.com') in domains_list:
+        elif not target.endswith('.com') and (target + '.com') in domains_set:
             all_domains.add(target + '.com')
         else:
             print(f"Warning: '{target}' not found in config")
@@ -207,25 +188,23 @@ def cmd_unblock(args, targets=None):
         sys.exit(1)
     
     # Check if these domains are already in active or pending sessions
-    active_sessions = db.get_active_sessions()
-    pending_sessions = db.get_pending_sessions()
-    
-    # Check each domain
-    for session_list, session_type in [(active_sessions, "active"), (pending_sessions, "pending")]:
-        for session in session_list:
-            # Check if this is an IDENTICAL session (same domains, not just overlapping)
-            if set(session['domains']) == all_domains and session['session_type'] != 'bypass':
-                if session_type == "active":
-                    remaining = session['end_time'] - datetime.now().timestamp()
-                    print(f"'{', '.join(targets)}' already unblocked in session {session['id']}")
-                    print(f"Time remaining: {format_time_remaining(remaining)}")
-                else:
-                    wait_remaining = session['wait_until'] - datetime.now().timestamp()
-                    print(f"'{', '.join(targets)}' already pending in session {session['id']}")
-                    print(f"Starts in: {format_time_remaining(wait_remaining)}")
-                    duration = session['end_time'] - session['wait_until']
-                    print(f"Duration: {format_time_remaining(duration)}")
-                return
+    active_sessions, pending_sessions = db.get_live_sessions()
+    now_ts = time.time()
+    
+    # Look up an IDENTICAL session (same domains, not just overlapping)
+    session = db.find_session_by_domains(all_domains)
+    if session is not None:
+        if session['wait_until'] <= now_ts:
+            remaining = session['end_time'] - now_ts
+            print(f"'{', '.join(targets)}' already unblocked in session {session['id']}")
+            print(f"Time remaining: {format_time_remaining(remaining)}")
+        else:
+            wait_remaining = session['wait_until'] - now_ts
+            print(f"'{', '.join(targets)}' already pending in session {session['id']}")
+            print(f"Starts in: {format_time_remaining(wait_remaining)}")
+            duration = session['end_time'] - session['wait_until']
+            print(f"Duration: {format_time_remaining(duration)}")
+        return
     
     # Check session limit (default 4)
     total_sessions = len(active_sessions) + len(pending_sessions)
@@ -237,7 +216,7 @@ def cmd_unblock(args, targets=None):
     if replace_id is not None:
         # Replace a specific session
         found = False
-        for session in active_sessions + pending_sessions:
+        for session in chain(active_sessions, pending_sessions):
             if session['id'] == replace_id:
                 db.cancel_session(session['id'])
                 print(f"Replaced session {replace_id}")
@@ -249,7 +228,7 @@ def cmd_unblock(args, targets=None):
     elif total_sessions >= session_limit:
         print(f"Session limit reached ({session_limit} sessions). Current sessions:")
         print()
-        cmd_status(args)
+        cmd_status(args, active_sessions=active_sessions, pending_sessions=pending_sessions)
         print()
         print("Options:")
         print(f"  1. Cancel a session: block cancel <id>")
@@ -258,7 +237,7 @@ def cmd_unblock(args, targets=None):
         return
     
     # Determine wait time
-    has_ultra = any(is_ultra_distracting(d, sections) for d in all_domains)
+    has_ultra = not all_domains.isdisjoint(sections.get('ultra_distracting', ()))
     
     wait = getattr(args, 'wait', None)
     if wait is None:
@@ -292,7 +271,7 @@ def cmd_unblock(args, targets=None):
 
 def cmd_bypass(args):
     """Emergency 5-minute unblock (once per hour)."""
-    available, remaining = db.check_bypass_cooldown()
+    available, remaining = db.check_profile_cooldown('bypass', BYPASS_COOLDOWN_MINUTES)
     
     if not available:
         print(f"Bypass on cooldown: {format_time_remaining(remaining)} remaining")
@@ -307,7 +286,7 @@ def cmd_bypass(args):
         'bypass'
     )
     
-    db.set_bypass_used()
+    db.set_profile_cooldown('bypass', BYPASS_COOLDOWN_MINUTES)
     
     print(f"Bypass activated! All domains unblocked for 5 minutes")
     print(f"Session ID: {session_id}")
@@ -342,18 +321,16 @@ def cmd_cancel(args, session_id=None):
         db.cancel_session(session_id)
         print(f"Cancelled session {session_id}")
     else:
-        active = db.get_active_sessions()
-        pending = db.get_pending_sessions()
-        all_sessions = active + pending
+        active, pending = db.get_live_sessions()
+        session_count = len(active) + len(pending)
         
-        if not all_sessions:
+        if not session_count:
             print("No sessions to cancel")
             return
         
-        for session in all_sessions:
-            db.cancel_session(session['id'])
+        db.cancel_sessions([session['id'] for session in chain(active, pending)])
         
-        print(f"Cancelled {len(all_sessions)} session(s)")
+        print(f"Cancelled {session_count} session(s)")
 
 
 def cmd_extend(args, session_id=None, minutes=None):
@@ -375,7 +352,7 @@ def cmd_extend(args, session_id=None, minutes=None):
         sys.exit(1)
     
     # Check if session is active
-    current_time = datetime.now().timestamp()
+    current_time = time.time()
     if session['wait_until'] > current_time:
         print(f"Session {session_id} hasn't started yet")
         sys.exit(1)
@@ -393,47 +370,19 @@ def cmd_extend(args, session_id=None, minutes=None):
         is_actively_used = False
         active_domain = None
         
+        front_app, active_url = get_frontmost_context()
         for domain in session['domains']:
             # Check if it's Slack and Slack is frontmost
-            if domain == 'slack.com':
-                try:
-                    script = '''
-                    tell application "System Events"
-                        set frontApp to name of first application process whose frontmost is true
-                        if frontApp is "Slack" then
-                            return "true"
-                        end if
-                    end tell
-                    return "false"
-                    '''
-                    result = subprocess.run(['osascript', '-e', script], capture_output=True, text=True)
-                    if result.stdout.strip() == "true":
-                        is_actively_used = True
-                        active_domain = "Slack"
-                        break
-                except:
-                    pass
-        
-            # Check if Chrome has an active tab with this domain
-            try:
-                script = f'''
-                tell application "Google Chrome"
-                    if it is running then
-                        set activeURL to URL of active tab of front window
-                        if activeURL contains "://{domain}" or activeURL contains "://www.{domain}" then
-                            return "true"
-                        end if
-                    end if
-                end tell
-                return "false"
-                '''
-                result = subprocess.run(['osascript', '-e', script], capture_output=True, text=True)
-                if result.stdout.strip() == "true":
-                    is_actively_used = True
-                    active_domain = domain
-                    break
-            except:
-                pass
+            if domain == 'slack.com' and front_app == "Slack":
+                is_actively_used = True
+                active_domain = "Slack"
+                break
+            
+            # Check if Chrome's active tab is on this domain
+            if url_matches_domains(active_url, (domain,)):
+                is_actively_used = True
+                active_domain = domain
+                break
     
     if not is_actively_used:
         print(f"Session {session_id} cannot be extended - no active use detected")
@@ -452,21 +401,21 @@ def cmd_extend(args, session_id=None, minutes=None):
 
 def cmd_daemon(args):
     """Control the daemon."""
+    import subprocess
     if args.action == 'start':
-        result = subprocess.run(['sudo', 'launchctl', 'list'], capture_output=True, text=True)
-        if 'com.taviblock.daemon' in result.stdout:
+        if is_daemon_loaded():
             print("Daemon already running")
         else:
-            subprocess.run(['sudo', 'launchctl', 'load', '/Library/LaunchDaemons/com.taviblock.daemon.plist'])
+            subprocess.run(['sudo', 'launchctl', 'load', DAEMON_PLIST])
             print("Daemon started")
     
     elif args.action == 'stop':
-        subprocess.run(['sudo', 'launchctl', 'unload', '/Library/LaunchDaemons/com.taviblock.daemon.plist'])
+        subprocess.run(['sudo', 'launchctl', 'unload', DAEMON_PLIST])
         print("Daemon stopped")
     
     elif args.action == 'restart':
-        subprocess.run(['sudo', 'launchctl', 'unload', '/Library/LaunchDaemons/com.taviblock.daemon.plist'])
-        subprocess.run(['sudo', 'launchctl', 'load', '/Library/LaunchDaemons/com.taviblock.daemon.plist'])
+        subprocess.run(['sudo', 'launchctl', 'unload', DAEMON_PLIST])
+        subprocess.run(['sudo', 'launchctl', 'load', DAEMON_PLIST])
         print("Daemon restarted")
     
     elif args.action == 'logs':
@@ -477,84 +426,61 @@ def cmd_daemon(args):
             print(f"Log file not found: {log_path}")
 
 
+def is_daemon_loaded():
+    """Check whether the daemon's launchd service is loaded."""
+    import subprocess
+    result = subprocess.run(['launchctl', 'list', DAEMON_LABEL],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return result.returncode == 0
+
+
+def is_daemon_alive():
+    """Check whether the pid in the daemon's pidfile is a live process."""
+    try:
+        with open(DAEMON_PID_PATH) as f:
+            pid = int(f.read().strip())
+        os.kill(pid, 0)
+    except PermissionError:
+        # Process exists but belongs to another user
+        return True
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+# Set once the daemon has been confirmed running in this process
+_daemon_checked = False
+
+
 def check_daemon_running():
     """Check if the daemon is running and start it if not."""
-    result = subprocess.run(['launchctl', 'list'], capture_output=True, text=True)
-    if 'com.taviblock.daemon' not in result.stdout:
+    global _daemon_checked
+    if _daemon_checked or is_daemon_alive():
+        _daemon_checked = True
+        return True
+
+    # No live pidfile; fall back to asking launchd
+    if not is_daemon_loaded():
+        import subprocess
         print("Warning: Block daemon not running. Starting it now...")
-        subprocess.run(['launchctl', 'load', '/Library/LaunchDaemons/com.taviblock.daemon.plist'],
+        subprocess.run(['launchctl', 'load', DAEMON_PLIST],
                       stderr=subprocess.DEVNULL)
         # Give it a moment to start
-        import time
         time.sleep(2)
         
         # Check again
-        result = subprocess.run(['launchctl', 'list'], capture_output=True, text=True)
-        if 'com.taviblock.daemon' not in result.stdout:
+        if not is_daemon_loaded():
             print("ERROR: Failed to start daemon. Blocking may not work correctly.")
             print("Try: sudo block daemon restart")
             return False
+
+    _daemon_checked = True
     return True
 
 
-def main():
-    require_admin()
-    
-    # Initialize database
-    db.init_db()
-    
-    # Check daemon is running (except for daemon commands)
-    if len(sys.argv) < 2 or (len(sys.argv) >= 2 and sys.argv[1] != 'daemon'):
-        check_daemon_running()
-    
-    # Handle simple command patterns first
-    args = sys.argv[1:]
-    
-    if not args:
-        # No args = status
-        cmd_status(argparse.Namespace(config=CONFIG_FILE_DEFAULT))
-        return
-    
-    # Single special commands
-    if len(args) == 1:
-        if args[0] == 'bypass':
-            cmd_bypass(argparse.Namespace(config=CONFIG_FILE_DEFAULT))
-            return
-        elif args[0] == 'peek':
-            cmd_peek(argparse.Namespace(config=CONFIG_FILE_DEFAULT))
-            return
-        elif args[0] == 'status':
-            cmd_status(argparse.Namespace(config=CONFIG_FILE_DEFAULT))
-            return
-        elif args[0] == 'cancel':
-            cmd_cancel(argparse.Namespace(config=CONFIG_FILE_DEFAULT), None)
-            return
-    
-    # Cancel with ID
-    if len(args) == 2 and args[0] == 'cancel':
-        try:
-            session_id = int(args[1])
-            cmd_cancel(argparse.Namespace(config=CONFIG_FILE_DEFAULT), session_id)
-            return
-        except ValueError:
-            pass
-    
-    # Extend command
-    if len(args) == 3 and args[0] == 'extend':
-        try:
-            session_id = int(args[1])
-            minutes = int(args[2])
-            cmd_extend(argparse.Namespace(config=CONFIG_FILE_DEFAULT), session_id, minutes)
-            return
-        except ValueError:
-            pass
-    
-    # Daemon commands
-    if args[0] == 'daemon' and len(args) >= 2:
-        cmd_daemon(argparse.Namespace(action=args[1]))
-        return
-    
-    # Full parser for complex commands
+def _build_full_parser():
+    """Build the argparse parser for commands the fast paths don't handle."""
+    import argparse
     parser = argparse.ArgumentParser(
         description="Block - Streamlined domain blocking",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -615,29 +541,94 @@ Examples:
     parser_daemon.add_argument('action', choices=['start', 'stop', 'restart', 'logs'])
     parser_daemon.set_defaults(func=cmd_daemon)
     
+    return parser
+
+
+# All subcommands; anything else is treated as unblock targets
+COMMANDS = frozenset(('unblock', 'status', 'bypass', 'peek', 'cancel', 'extend', 'daemon'))
+
+# Commands that take no arguments beyond the defaults
+SIMPLE_COMMANDS = {
+    'bypass': cmd_bypass,
+    'peek': cmd_peek,
+    'status': cmd_status,
+    'cancel': cmd_cancel,
+}
+
+
+def main():
+    args = sys.argv[1:]
+    is_daemon_command = bool(args) and args[0] == 'daemon'
+    
+    # Viewing logs only tails a file; everything else needs root
+    if not (is_daemon_command and args[1:2] == ['logs']):
+        require_admin()
+    
+    # Daemon control doesn't touch the database or need the daemon running
+    if not is_daemon_command:
+        db.init_db()
+        check_daemon_running()
+    
+    # Handle simple command patterns first
+    default_args = SimpleNamespace(config=CONFIG_FILE_DEFAULT)
+    
+    if not args:
+        # No args = status
+        cmd_status(default_args)
+        return
+    
+    # Single special commands
+    if len(args) == 1 and args[0] in SIMPLE_COMMANDS:
+        SIMPLE_COMMANDS[args[0]](default_args)
+        return
+    
+    # Cancel with ID
+    if len(args) == 2 and args[0] == 'cancel':
+        try:
+            session_id = int(args[1])
+            cmd_cancel(default_args, session_id)
+            return
+        except ValueError:
+            pass
+    
+    # Extend command
+    if len(args) == 3 and args[0] == 'extend':
+        try:
+            session_id = int(args[1])
+            minutes = int(args[2])
+            cmd_extend(default_args, session_id, minutes)
+            return
+        except ValueError:
+            pass
+    
+    # Daemon commands
+    if args[0] == 'daemon' and len(args) >= 2:
+        cmd_daemon(SimpleNamespace(action=args[1]))
+        return
+    
     # If no recognized subcommand, assume it's targets for unblock
-    if args and args[0] not in ['unblock', 'status', 'bypass', 'peek', 'cancel', 'extend', 'daemon']:
+    if args[0] not in COMMANDS:
         # Check for -r flag with ID in simple form
         replace_id = None
-        targets = []
-        i = 0
-        while i < len(args):
-            if args[i] in ['-r', '--replace']:
-                if i + 1 < len(args) and args[i + 1].isdigit():
-                    replace_id = int(args[i + 1])
-                    i += 2
-                else:
-                    print("Error: -r requires a session ID")
-                    return
+        targets = args
+        for flag in ('-r', '--replace'):
+            try:
+                i = targets.index(flag)
+            except ValueError:
+                continue
+            if i + 1 < len(targets) and targets[i + 1].isdigit():
+                replace_id = int(targets[i + 1])
+                targets = targets[:i] + targets[i + 2:]
             else:
-                targets.append(args[i])
-                i += 1
+                print("Error: -r requires a session ID")
+                return
         
         # Treat as unblock targets
-        cmd_unblock(argparse.Namespace(config=CONFIG_FILE_DEFAULT, wait=None, duration=None, replace=replace_id), targets)
+        cmd_unblock(SimpleNamespace(config=CONFIG_FILE_DEFAULT, wait=None, duration=None, replace=replace_id), targets)
         return
     
-    # Parse and execute
+    # Full parser for complex commands
+    parser = _build_full_parser()
     parsed_args = parser.parse_args()
     if hasattr(parsed_args, 'func'):
         parsed_args.func(parsed_args)
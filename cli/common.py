@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+"""Helpers shared by the taviblock CLI, the legacy block CLI and the daemon.
+
+Imports nothing from the package, so it loads the same way whether the
+caller imports it as cli.common or with cli/ on sys.path.
+"""
+import subprocess
+
+# Max hostnames per /etc/hosts line
+HOSTS_PER_LINE = 9
+
+# Subdomains also blocked for every root domain, precomputed as prefixes
+_SUBDOMAIN_PREFIXES = tuple(f"{sub}." for sub in ("www", "m", "mobile", "login", "app", "api"))
+
+# Reports the frontmost app and Chrome's active tab URL as "app|url"
+FRONTMOST_CONTEXT_SCRIPT = '''
+set frontApp to ""
+set activeURL to ""
+try
+    tell application "System Events"
+        set frontApp to name of first application process whose frontmost is true
+    end tell
+end try
+if application "Google Chrome" is running then
+    try
+        tell application "Google Chrome"
+            set activeURL to URL of active tab of front window
+        end tell
+    end try
+end if
+return frontApp & "|" & activeURL
+'''
+
+
+def get_frontmost_context(osa_args=None):
+    """Return (frontmost app name, Chrome active tab URL) from one osascript call.
+    
+    osa_args replaces the default ['-e', FRONTMOST_CONTEXT_SCRIPT], e.g. with
+    the path of a precompiled copy of the script.
+    """
+    if osa_args is None:
+        osa_args = ['-e', FRONTMOST_CONTEXT_SCRIPT]
+    try:
+        result = subprocess.run(['osascript', *osa_args], capture_output=True, text=True)
+    except OSError:
+        return "", ""
+    front_app, _, active_url = result.stdout.strip().partition("|")
+    return front_app, active_url
+
+
+def generate_block_entries(domains):
+    """Generate hosts file entries for IPv4 and IPv6 as a list of lines.
+    
+    Hostnames are packed HOSTS_PER_LINE to a line, which keeps the hosts
+    file small for the resolver to re-parse.
+    """
+    hosts = []
+    extend = hosts.extend
+    
+    for domain in domains:
+        domain = domain.strip()
+        if not domain:
+            continue
+        hosts.append(domain)
+        if domain.count(".") == 1:  # root domain
+            extend([prefix + domain for prefix in _SUBDOMAIN_PREFIXES])
+    
+    entries = []
+    for address in ("127.0.0.1 ", "::1 "):
+        for i in range(0, len(hosts), HOSTS_PER_LINE):
+            entries.append(address + " ".join(hosts[i:i + HOSTS_PER_LINE]))
+    return entries
+
+
+def generate_block_text(domains):
+    """Generate hosts file entries as a single newline-joined string."""
+    return "\n".join(generate_block_entries(domains))
+
+
+def url_domain(url):
+    """Return a URL's hostname without port or leading "www.", lowercased."""
+    _, sep, rest = url.partition("://")
+    if not sep:
+        return ""
+    host = rest.split("/", 1)[0].split("?", 1)[0].split("#", 1)[0]
+    host = host.rpartition("@")[2].split(":", 1)[0].lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def url_matches_domains(url, domains):
+    """Check whether url's host is one of domains or a subdomain of one."""
+    host = url_domain(url)
+    while host:
+        if host in domains:
+            return True
+        host = host.partition(".")[2]
+    return False
+
+
+def plural(count, unit):
+    """Format a count with its unit, pluralized when needed."""
+    return f"{count} {unit}{'s' if count != 1 else ''}"
+
+
+def format_time_remaining(seconds):
+    """Format seconds into human-readable time."""
+    s = int(seconds)
+    if s < 60:
+        return f"{s} seconds"
+    hours, rem = divmod(s, 3600)
+    minutes, secs = divmod(rem, 60)
+    if hours:
+        if minutes:
+            return f"{plural(hours, 'hour')} {plural(minutes, 'minute')}"
+        return plural(hours, 'hour')
+    if s <= 300 and secs:  # 5 minutes or less, show minutes and seconds
+        return f"{plural(minutes, 'minute')} {plural(secs, 'second')}"
+    return plural(minutes, 'minute')
@@ -7,10 +7,24 @@ from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple, Any
 import yaml
 
+try:
+    # LibYAML-backed loader, several times faster than the pure-Python one
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+
+# Real path -> (mtime_ns, size, parsed YAML); one entry per file, replaced when
+# the file changes. The data is treated as read-only.
+_CONFIG_CACHE: Dict[str, Tuple[int, int, dict]] = {}
+
 
 class Config:
     """Taviblock configuration loaded from YAML"""
     
+    __slots__ = ('config_path', 'data', 'domains', 'profiles', '_all_domains',
+                 '_all_tags', '_by_tag', '_resolved', '_resolve_cache', '_tag_rules')
+    
     def __init__(self, config_path: str = None):
         if config_path is None:
             # Look for config in standard locations
@@ -33,25 +47,69 @@ class Config:
                     "\n".join(f"  - {p}" for p in possible_paths)
                 )
         
-        with open(config_path, 'r') as f:
-            self.data = yaml.safe_load(f)
+        self.config_path = config_path
+        st = os.stat(config_path)
+        real_path = os.path.realpath(config_path)
+        cached = _CONFIG_CACHE.get(real_path)
+        if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+            data = cached[2]
+        else:
+            with open(config_path, 'r') as f:
+                data = yaml.load(f, Loader=SafeLoader)
+            _CONFIG_CACHE[real_path] = (st.st_mtime_ns, st.st_size, data)
+        self.data = data
         
         self.domains = self.data.get('domains', {})
         self.profiles = self.data.get('profiles', {})
+        self._build_indices()
     
-    def get_all_domains(self) -> List[str]:
-        """Get all configured domains (individual + from groups)"""
-        all_domains = []
+    def _build_indices(self):
+        """Precompute domain and tag lookups so queries don't rescan self.domains"""
+        all_domains = set()
+        all_tags = set()
+        by_tag: Dict[str, Tuple[Set[str], Set[str]]] = {}
+        resolved: Dict[str, Tuple[List[str], frozenset]] = {}
         
         for name, config in self.domains.items():
-            if isinstance(config, dict) and 'domains' in config:
-                # It's a group
-                all_domains.extend(config['domains'])
+            if isinstance(config, dict):
+                # Groups expand to their members, individual domains to themselves
+                members = config['domains'] if 'domains' in config else [name]
+                tags = frozenset(config.get('tags', ()))
+                resolved[name] = (members, tags)
+                for tag in tags:
+                    tagged_domains, tagged_tags = by_tag.setdefault(tag, (set(), set()))
+                    tagged_domains.update(members)
+                    tagged_tags.update(tags)
+                all_tags.update(tags)
+                all_domains.update(members)
             else:
-                # It's an individual domain
-                all_domains.append(name)
-        
-        return list(set(all_domains))
+                # Bare domains are blocked but contribute nothing when targeted
+                resolved[name] = ([], frozenset())
+                all_domains.add(name)
+        
+        # Let targets omit a .com suffix unless that name is configured itself
+        for name in list(resolved):
+            if name.endswith('.com'):
+                alias = name[:-4]
+                if alias not in resolved and not alias.endswith('.com'):
+                    resolved[alias] = resolved[name]
+        
+        self._all_domains = frozenset(all_domains)
+        self._all_tags = frozenset(all_tags)
+        self._by_tag = by_tag
+        self._resolved = resolved
+        # profile -> [(frozenset of rule tags, rule)] for calculate_timing
+        self._tag_rules = {
+            name: [(frozenset(rule['tags']), rule)
+                   for rule in profile.get('tag_rules', ()) if 'tags' in rule]
+            for name, profile in self.profiles.items()
+        }
+        # (profile, targets) -> (domains, tags), filled lazily by resolve_targets
+        self._resolve_cache: Dict[tuple, Tuple[tuple, frozenset]] = {}
+    
+    def get_all_domains(self) -> List[str]:
+        """Get all configured domains (individual + from groups)"""
+        return list(self._all_domains)
     
     def resolve_targets(self, targets: List[str], profile_name: str = 'unblock') -> Tuple[List[str], Set[str]]:
         """
@@ -60,8 +118,19 @@ class Config:
         Returns:
             Tuple of (list of domains, set of all tags)
         """
+        targets = [target.strip() for target in targets]
+        key = (profile_name, frozenset(targets))
+        cached = self._resolve_cache.get(key)
+        if cached is None:
+            domains, all_tags = self._resolve_targets(targets, profile_name)
+            cached = self._resolve_cache[key] = (tuple(domains), frozenset(all_tags))
+        # Hand out fresh containers so callers can't corrupt the cache
+        return list(cached[0]), set(cached[1])
+    
+    def _resolve_targets(self, targets: List[str], profile_name: str) -> Tuple[List[str], Set[str]]:
+        """Uncached implementation of resolve_targets"""
         profile = self.profiles.get(profile_name, {})
-        domains = []
+        domains: Set[str] = set()
         all_tags = set()
         
         # Handle special scopes
@@ -71,9 +140,9 @@ class Config:
         if 'tags' in profile:
             # Profile specifies tags to unblock
             for tag in profile['tags']:
-                tagged_domains, _ = self._get_domains_by_tag(tag)
-                domains.extend(tagged_domains)
-            return list(set(domains)), set(profile['tags'])
+                if tag in self._by_tag:
+                    domains.update(self._by_tag[tag][0])
+            return list(domains), set(profile['tags'])
         
         if 'only' in profile:
             # Profile specifies exact domains/groups
@@ -83,62 +152,22 @@ class Config:
         for target in targets:
             target = target.strip()
             
-            # Check if it's a configured domain or group
-            if target in self.domains:
-                config = self.domains[target]
-                if isinstance(config, dict):
-                    if 'domains' in config:
-                        # It's a group
-                        domains.extend(config['domains'])
-                    else:
-                        # Individual domain with config
-                        domains.append(target)
-                    # Collect tags
-                    if 'tags' in config:
-                        all_tags.update(config['tags'])
-            
-            # Try adding .com if not found
-            elif not target.endswith('.com') and (target + '.com') in self.domains:
-                target_com = target + '.com'
-                config = self.domains[target_com]
-                if isinstance(config, dict):
-                    if 'domains' in config:
-                        domains.extend(config['domains'])
-                    else:
-                        domains.append(target_com)
-                    if 'tags' in config:
-                        all_tags.update(config['tags'])
-            
-            # If still not found, it's invalid
-            else:
+            entry = self._resolved.get(target)
+            if entry is None:
                 raise ValueError(f"Unknown domain or group: {target}")
+            domains.update(entry[0])
+            all_tags.update(entry[1])
         
-        return list(set(domains)), all_tags
+        return list(domains), all_tags
     
     def _get_domains_by_tag(self, tag: str) -> Tuple[List[str], Set[str]]:
         """Get all domains that have a specific tag"""
-        domains = []
-        all_tags = set()
-        
-        for name, config in self.domains.items():
-            if isinstance(config, dict) and 'tags' in config and tag in config['tags']:
-                if 'domains' in config:
-                    # It's a group
-                    domains.extend(config['domains'])
-                else:
-                    # Individual domain
-                    domains.append(name)
-                all_tags.update(config['tags'])
-        
-        return domains, all_tags
+        domains, all_tags = self._by_tag.get(tag, ((), ()))
+        return list(domains), set(all_tags)
     
     def _get_all_tags(self) -> Set[str]:
         """Get all tags from all domains"""
-        all_tags = set()
-        for config in self.domains.values():
-            if isinstance(config, dict) and 'tags' in config:
-                all_tags.update(config['tags'])
-        return all_tags
+        return set(self._all_tags)
     
     def calculate_timing(self, profile_name: str, target_count: int, 
                         concurrent_sessions: int, all_tags: Set[str]) -> Dict[str, Any]:
@@ -169,14 +198,12 @@ class Config:
                 wait = 5  # Default
         
         # Check for tag-based overrides
-        if 'tag_rules' in profile:
-            for rule in profile['tag_rules']:
-                if 'tags' in rule:
-                    # Check if any of the rule's tags are in our tags
-                    if any(tag in all_tags for tag in rule['tags']):
-                        if 'wait_override' in rule:
-                            wait = rule['wait_override']
-                            break
+        for rule_tags, rule in self._tag_rules.get(profile_name, ()):
+            # Check if any of the rule's tags are in our tags
+            if not rule_tags.isdisjoint(all_tags):
+                if 'wait_override' in rule:
+                    wait = rule['wait_override']
+                    break
         
         # Apply progressive penalty if enabled
         from cli import penalty
@@ -206,10 +233,5 @@ class Config:
     
     def is_valid_target(self, target: str) -> bool:
         """Check if a target is a valid configured domain or group"""
-        # Direct match
-        if target in self.domains:
-            return True
-        # Try with .com suffix
-        if not target.endswith('.com') and (target + '.com') in self.domains:
-            return True
-        return False
\ No newline at end of file
+        # Direct matches and .com-less aliases are both indexed
+        return target in self._resolved
@@ -3,37 +3,92 @@ import time
 import os
 import sys
 import signal
+import select
+import selectors
+import socket
 import logging
+import resource
+from logging.handlers import MemoryHandler
 from pathlib import Path
-from datetime import datetime
 import subprocess
+import shutil
+import tempfile
 import db
+from cli.common import FRONTMOST_CONTEXT_SCRIPT, get_frontmost_context, url_matches_domains
 from cli.config_loader import Config
-from taviblock import generate_block_entries, HOSTS_PATH, BLOCKER_START, BLOCKER_END
+from taviblock import read_hosts, splice_hosts, replace_file, HOSTS_PATH
 
 # Logging setup
 LOG_DIR = Path("/var/log/taviblock")
 LOG_DIR.mkdir(exist_ok=True, parents=True)
 LOG_PATH = LOG_DIR / "daemon.log"
 
+# Pidfile lets the CLI check liveness without spawning launchctl
+PID_PATH = Path("/var/run/taviblock.pid")
+
+# Soft cap on open descriptors; keeps the child-side fd cleanup that
+# subprocess does before exec short when running as root under launchd
+MAX_OPEN_FILES = 1024
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Buffer file records and write them in batches: when 100 pile up, on any
+# warning, or when the main loop flushes before going to sleep
+_file_handler = logging.FileHandler(LOG_PATH)
+_file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+LOG_BUFFER = MemoryHandler(capacity=100, flushLevel=logging.WARNING, target=_file_handler)
+
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
+    format=LOG_FORMAT,
     handlers=[
-        logging.FileHandler(LOG_PATH),
+        LOG_BUFFER,
         logging.StreamHandler(sys.stdout)
     ]
 )
 
 logger = logging.getLogger(__name__)
 
+# One "window id<TAB>tab id<TAB>URL" line per Chrome tab, fetched a window at a time
+CHROME_TABS_SCRIPT = '''
+set output to ""
+set sep to character id 9
+if application "Google Chrome" is running then
+    tell application "Google Chrome"
+        repeat with w in windows
+            set windowId to (id of w) as text
+            set tabIds to id of every tab of w
+            set tabURLs to URL of every tab of w
+            repeat with i from 1 to count of tabIds
+                set output to output & windowId & sep & ((item i of tabIds) as text) & sep & (item i of tabURLs) & linefeed
+            end repeat
+        end repeat
+    end tell
+end if
+return output
+'''
+
+
 class TaviblockDaemon:
     def __init__(self):
         self.running = True
         self.config = Config()
+        self._cfg_cache = (None, None, None)  # (mtime_ns, size, all domains frozenset)
         self.notified_sessions = set()  # Track sessions we've notified about
         self.last_applescript_check = 0  # Track last AppleScript execution time
         self.applescript_interval = 5  # Run AppleScript checks every 5 seconds
+        self.last_enforce = 0  # Track last tab/app enforcement sweep
+        self.enforce_interval = 30  # Re-sweep every 30 seconds even if nothing changed
+        self._tick_cache = {}  # AppleScript lookups, reset every loop iteration
+        self._proc_cache = {}  # process name -> (monotonic check time, pids)
+        # osascript arguments for the fixed scripts; compile_scripts() swaps
+        # the source for precompiled .scpt files when osacompile is available
+        self._osa_args = {
+            'frontmost': ['-e', FRONTMOST_CONTEXT_SCRIPT],
+            'chrome_tabs': ['-e', CHROME_TABS_SCRIPT],
+        }
+        self._script_dir = None
+        self.process_check_ttl = 5  # Seconds to trust a pgrep result
         
         # Make daemon harder to kill - ignore common signals
         signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ignore Ctrl+C
@@ -43,76 +98,233 @@ class TaviblockDaemon:
         # Only handle SIGTERM for graceful shutdown (from launchctl)
         signal.signal(signal.SIGTERM, self.handle_signal)
         
+        # The loop sleeps until the next session boundary; the CLI's wake-up
+        # datagrams and SIGTERM (via the wakeup fd) cut the sleep short
+        self._selector = selectors.DefaultSelector()
+        self._signal_r, self._signal_w = socket.socketpair()
+        self._signal_r.setblocking(False)
+        self._signal_w.setblocking(False)
+        signal.set_wakeup_fd(self._signal_w.fileno())
+        self._selector.register(self._signal_r, selectors.EVENT_READ)
+        self._wake_sock = None
+        
+        # Kernel watches on the hosts and config files where kqueue exists
+        # (macOS); elsewhere the periodic sweep re-checks /etc/hosts instead
+        self._file_watch = select.kqueue() if hasattr(select, 'kqueue') else None
+        self._watched_fds = []
+        self._hosts_dirty = False
+        self._hosts_watched = False
+        self._hosts_state = None  # (contents, mode) of /etc/hosts as last read or written
+        if self._file_watch is not None:
+            self._selector.register(self._file_watch, selectors.EVENT_READ)
+        
     def handle_signal(self, signum, frame):
         """Handle shutdown signals gracefully."""
         logger.info(f"Received signal {signum}, shutting down...")
         self.running = False
         
-    def is_chrome_running(self):
-        """Check if Chrome is running using lightweight process check."""
+    def open_wake_socket(self):
+        """Listen for wake-up datagrams sent by db.notify_daemon()."""
+        try:
+            os.unlink(db.DAEMON_SOCKET_PATH)
+        except FileNotFoundError:
+            pass
+        try:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.bind(db.DAEMON_SOCKET_PATH)
+            sock.setblocking(False)
+        except OSError as e:
+            # Fall back to waking on session boundaries and the sweep interval
+            logger.error(f"Error opening wake socket: {e}")
+            return
+        self._wake_sock = sock
+        self._selector.register(sock, selectors.EVENT_READ)
+    
+    def close_wake_socket(self):
+        """Stop listening for wake-ups and remove the socket file."""
+        if self._wake_sock is None:
+            return
+        self._selector.unregister(self._wake_sock)
+        self._wake_sock.close()
+        self._wake_sock = None
         try:
-            result = subprocess.run(['pgrep', '-x', 'Google Chrome'], capture_output=True)
-            return result.returncode == 0
+            os.unlink(db.DAEMON_SOCKET_PATH)
+        except OSError:
+            pass
+    
+    def watch_files(self):
+        """(Re)arm kqueue watches on the hosts and config files."""
+        if self._file_watch is None:
+            return
+        self.unwatch_files()
+        
+        changes = []
+        for path in (HOSTS_PATH, self.config.config_path):
+            try:
+                fd = os.open(path, getattr(os, 'O_EVTONLY', os.O_RDONLY))
+            except OSError as e:
+                logger.error(f"Error watching {path}: {e}")
+                continue
+            self._watched_fds.append(fd)
+            if path == HOSTS_PATH:
+                self._hosts_watched = True
+            changes.append(select.kevent(
+                fd,
+                filter=select.KQ_FILTER_VNODE,
+                flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR,
+                fflags=(select.KQ_NOTE_WRITE | select.KQ_NOTE_EXTEND | select.KQ_NOTE_ATTRIB
+                        | select.KQ_NOTE_DELETE | select.KQ_NOTE_RENAME),
+            ))
+        if changes:
+            self._file_watch.control(changes, 0, 0)
+    
+    def unwatch_files(self):
+        """Drop the file watches; closing a descriptor removes its kevent."""
+        for fd in self._watched_fds:
+            os.close(fd)
+        self._watched_fds = []
+        self._hosts_watched = False
+    
+    def wait_for_event(self, timeout):
+        """Sleep until timeout elapses, a session or watched file changes, or a signal arrives."""
+        for key, _ in self._selector.select(timeout):
+            if key.fileobj is self._file_watch:
+                # Config edits are picked up by the per-tick stat; a hosts edit
+                # forces a rewrite check. Replaced files need fresh watches.
+                self._file_watch.control(None, 16, 0)
+                self._hosts_dirty = True
+                self._hosts_state = None
+                self.watch_files()
+                continue
+            # Drain everything queued so the next wait blocks again
+            try:
+                while key.fileobj.recv(512):
+                    pass
+            except (BlockingIOError, InterruptedError):
+                pass
+    
+    def seconds_until_next_event(self, now, active_sessions):
+        """Time until the next session boundary or periodic check is due."""
+        deadlines = [self.last_enforce + self.enforce_interval]
+        
+        next_deadline = db.get_next_deadline(notify_lead=65, now=now)
+        if next_deadline is not None:
+            deadlines.append(next_deadline)
+        
+        # Re-check sessions already inside the 60-65 second notification window
+        for session in active_sessions:
+            if (session['session_type'] != 'bypass'
+                    and session['id'] not in self.notified_sessions
+                    and now <= session['end_time'] - 60 < now + 5):
+                deadlines.append(self.last_applescript_check + self.applescript_interval)
+                break
+        
+        # Land just past the boundary so strict time comparisons see it
+        return max(0.0, min(deadlines) - now) + 0.05
+    
+    def compile_scripts(self):
+        """Precompile the fixed AppleScripts so each run skips parsing and compiling."""
+        try:
+            self._script_dir = tempfile.mkdtemp(prefix='taviblock-')
+            for name, (_, source) in self._osa_args.items():
+                path = os.path.join(self._script_dir, f"{name}.scpt")
+                result = subprocess.run(['osacompile', '-o', path, '-e', source],
+                                        capture_output=True)
+                if result.returncode == 0:
+                    self._osa_args[name] = [path]
+        except Exception as e:
+            # Keep running the scripts from source
+            logger.warning(f"Could not precompile AppleScripts: {e}")
+    
+    def remove_compiled_scripts(self):
+        """Delete the precompiled scripts directory."""
+        if self._script_dir:
+            shutil.rmtree(self._script_dir, ignore_errors=True)
+            self._script_dir = None
+    
+    def get_process_pids(self, name, fresh=False):
+        """Return the pids of processes named exactly name.
+        
+        Results younger than process_check_ttl are reused unless fresh is set.
+        """
+        now = time.monotonic()
+        cached = self._proc_cache.get(name)
+        if not fresh and cached is not None and now - cached[0] < self.process_check_ttl:
+            return cached[1]
+        try:
+            # Our descriptors are non-inheritable, so skip the close_fds sweep
+            result = subprocess.run(['pgrep', '-x', name], capture_output=True, close_fds=False)
+            pids = tuple(int(pid) for pid in result.stdout.split())
         except:
-            return False
+            pids = ()
+        self._proc_cache[name] = (now, pids)
+        return pids
+    
+    def is_process_running(self, name):
+        """Check if a process is running, reusing results younger than process_check_ttl."""
+        return bool(self.get_process_pids(name))
+    
+    def is_chrome_running(self):
+        """Check if Chrome is running using lightweight process check."""
+        return self.is_process_running('Google Chrome')
     
     def is_slack_running(self):
         """Check if Slack is running using lightweight process check."""
-        try:
-            result = subprocess.run(['pgrep', '-x', 'Slack'], capture_output=True)
-            return result.returncode == 0
-        except:
-            return False
+        return self.is_process_running('Slack')
         
     def update_hosts_file(self, domains_to_block):
         """Update /etc/hosts with the current blocking rules."""
         try:
-            # Read current hosts file
-            with open(HOSTS_PATH, 'r') as f:
-                lines = f.readlines()
-            
-            # Remove existing block section
-            new_lines = []
-            in_block_section = False
-            for line in lines:
-                if line.strip() == BLOCKER_START:
-                    in_block_section = True
-                    continue
-                if line.strip() == BLOCKER_END:
-                    in_block_section = False
-                    continue
-                if not in_block_section:
-                    new_lines.append(line.rstrip('\n'))
-            
-            # Add new block section with domains to block
-            if domains_to_block:
-                block_entries = generate_block_entries(domains_to_block)
-                new_lines.append(BLOCKER_START)
-                new_lines.extend(block_entries)
-                new_lines.append(BLOCKER_END)
-            
-            # Write back to hosts file
-            with open(HOSTS_PATH, 'w') as f:
-                f.write('\n'.join(new_lines) + '\n')
-                
-            logger.info(f"Updated hosts file with {len(domains_to_block)} blocked domains")
-            
+            # Reuse the contents we last read or wrote unless the file watch
+            # reported a change since
+            if self._hosts_state is None:
+                self._hosts_state = read_hosts(HOSTS_PATH)
+            data, mode = self._hosts_state
+            buf = splice_hosts(data, domains_to_block)
+            if buf != data:
+                replace_file(HOSTS_PATH, buf, mode)
+                logger.info(f"Updated hosts file with {len(domains_to_block)} blocked domains")
+            # Without a watch an outside edit would go unnoticed, so reread every time
+            self._hosts_state = (buf, mode) if self._hosts_watched else None
         except Exception as e:
+            self._hosts_state = None
             logger.error(f"Error updating hosts file: {e}")
     
-    def get_domains_to_block(self):
+    def get_all_config_domains(self):
+        """Return all configured domains, reloading the config only when its file changes."""
+        try:
+            st = os.stat(self.config.config_path)
+        except OSError:
+            # Keep blocking with what we have if the file vanishes mid-edit
+            return self._cfg_cache[2] or frozenset(self.config.get_all_domains())
+        
+        if (st.st_mtime_ns, st.st_size) != self._cfg_cache[:2]:
+            if self._cfg_cache[0] is not None:
+                try:
+                    self.config = Config(self.config.config_path)
+                    logger.info(f"Reloaded config from {self.config.config_path}")
+                except Exception as e:
+                    # Keep the previous config until the file is fixed
+                    logger.error(f"Error reloading config: {e}")
+            self._cfg_cache = (st.st_mtime_ns, st.st_size, frozenset(self.config.get_all_domains()))
+        return self._cfg_cache[2]
+    
+    def get_domains_to_block(self, unblocked_domains):
         """Calculate which domains should currently be blocked."""
         # Start with all domains from config - everything is blocked by default
-        all_domains = set(self.config.get_all_domains())
+        all_domains = self.get_all_config_domains()
         
-        # Get domains that are currently unblocked (temporary exceptions)
-        unblocked_domains = set(db.get_all_unblocked_domains())
-        
-        # Return domains that should be blocked (all minus unblocked)
-        return list(all_domains - unblocked_domains)
+        # Return domains that should be blocked (all minus temporary exceptions);
+        # difference() takes the unblocked list directly, no intermediate set
+        return list(all_domains.difference(unblocked_domains))
     
     def close_chrome_tabs_for_domains(self, domains):
-        """Close Chrome tabs for multiple domains using a single AppleScript call."""
+        """Close Chrome tabs for multiple domains.
+        
+        One AppleScript call lists every tab, the URLs are matched against
+        the domain set in Python, and a second call closes the matches by
+        their stable window and tab ids.
+        """
         if not domains:
             return
         
@@ -121,33 +333,27 @@ class TaviblockDaemon:
             return
             
         try:
-            # Build the URL checking conditions
-            conditions = []
-            for domain in domains:
-                conditions.append(f'(tabURL contains "://{domain}" or tabURL contains "://www.{domain}")')
+            result = subprocess.run(['osascript', *self._osa_args['chrome_tabs']],
+                                    capture_output=True, text=True)
             
-            condition_string = " or ".join(conditions)
+            domain_set = frozenset(domains)
+            to_close = []
+            for line in result.stdout.splitlines():
+                parts = line.split("\t", 2)
+                if (len(parts) == 3 and parts[0].isdigit() and parts[1].isdigit()
+                        and url_matches_domains(parts[2], domain_set)):
+                    to_close.append((parts[0], parts[1]))
             
-            script = f'''
-            if application "Google Chrome" is running then
-                tell application "Google Chrome"
-                    repeat with w in windows
-                        set tabsToClose to {{}}
-                        repeat with t in tabs of w
-                            set tabURL to URL of t
-                            if {condition_string} then
-                                set end of tabsToClose to t
-                            end if
-                        end repeat
-                        repeat with t in tabsToClose
-                            close t
-                        end repeat
-                    end repeat
-                end tell
-            end if
-            '''
+            if not to_close:
+                return
+            
+            closes = "\n".join(
+                f"try\nclose tab id {tab_id} of window id {window_id}\nend try"
+                for window_id, tab_id in to_close
+            )
+            script = f'tell application "Google Chrome"\n{closes}\nend tell'
             subprocess.run(['osascript', '-e', script], capture_output=True)
-            logger.debug(f"Closed Chrome tabs for {len(domains)} blocked domains")
+            logger.debug(f"Closed {len(to_close)} Chrome tabs for blocked domains")
         except Exception as e:
             logger.error(f"Error closing Chrome tabs: {e}")
     
@@ -155,62 +361,51 @@ class TaviblockDaemon:
         """Kill Slack application if slack.com is blocked."""
         if 'slack.com' in blocked_domains and self.is_slack_running():
             try:
-                subprocess.run(['killall', 'Slack'])
+                # Signal the pids pgrep finds instead of forking killall. Look
+                # them up fresh: a cached pid may have been reused by now.
+                for pid in self.get_process_pids('Slack', fresh=True):
+                    try:
+                        os.kill(pid, signal.SIGTERM)
+                    except ProcessLookupError:
+                        pass
+                self._proc_cache['Slack'] = (time.monotonic(), ())
                 logger.info("Killed Slack application (slack.com is blocked)")
             except Exception as e:
                 logger.error(f"Error killing Slack: {e}")
     
     def enforce_blocks(self, blocked_domains):
         """Close browser tabs and applications for blocked domains."""
+        if not (self.is_chrome_running() or self.is_slack_running()):
+            return
+        
         # Close Chrome tabs for all blocked domains in one call
         self.close_chrome_tabs_for_domains(blocked_domains)
         
         # Kill specific applications
         self.kill_slack_if_blocked(blocked_domains)
     
-    def check_active_chrome_tab(self, domain):
+    def get_frontmost_context(self):
+        """Return (frontmost app name, Chrome active tab URL) from one osascript call.
+        
+        The result is memoized for the rest of the loop iteration.
+        """
+        context = self._tick_cache.get('frontmost')
+        if context is None:
+            context = get_frontmost_context(self._osa_args['frontmost'])
+            self._tick_cache['frontmost'] = context
+        return context
+    
+    def check_active_chrome_tab(self, domain, active_url=None):
         """Check if a Chrome tab with this domain is currently active."""
-        # Skip if Chrome isn't running
-        if not self.is_chrome_running():
-            return False
-            
-        try:
-            script = f'''
-            tell application "Google Chrome"
-                if it is running then
-                    set activeURL to URL of active tab of front window
-                    if activeURL contains "://{domain}" or activeURL contains "://www.{domain}" then
-                        return "true"
-                    end if
-                end if
-            end tell
-            return "false"
-            '''
-            result = subprocess.run(['osascript', '-e', script], capture_output=True, text=True)
-            return result.stdout.strip() == "true"
-        except:
-            return False
+        if active_url is None:
+            active_url = self.get_frontmost_context()[1]
+        return url_matches_domains(active_url, (domain,))
     
-    def check_slack_frontmost(self):
+    def check_slack_frontmost(self, front_app=None):
         """Check if Slack is the frontmost application."""
-        # Skip if Slack isn't running
-        if not self.is_slack_running():
-            return False
-            
-        try:
-            script = '''
-            tell application "System Events"
-                set frontApp to name of first application process whose frontmost is true
-                if frontApp is "Slack" then
-                    return "true"
-                end if
-            end tell
-            return "false"
-            '''
-            result = subprocess.run(['osascript', '-e', script], capture_output=True, text=True)
-            return result.stdout.strip() == "true"
-        except:
-            return False
+        if front_app is None:
+            front_app = self.get_frontmost_context()[0]
+        return front_app == "Slack"
     
     def send_terminal_notification(self, session_id, domains, app_type):
         """Open a terminal window with interactive notification."""
@@ -238,10 +433,8 @@ class TaviblockDaemon:
         except Exception as e:
             logger.error(f"Error opening terminal notification: {e}")
     
-    def check_ending_sessions(self):
+    def check_ending_sessions(self, active_sessions, current_time):
         """Check for sessions ending soon and notify if actively used."""
-        active_sessions = db.get_active_sessions()
-        current_time = datetime.now().timestamp()
         
         # Clean up notified sessions that have ended
         sessions_to_remove = set()
@@ -260,9 +453,11 @@ class TaviblockDaemon:
             
             # Check if session ends in 60-65 seconds (give 5 second window)
             if 60 <= time_remaining <= 65 and session['id'] not in self.notified_sessions:
+                front_app, active_url = self.get_frontmost_context()
+                
                 # Check if any domain in this session is actively used
                 for domain in session['domains']:
-                    if domain == 'slack.com' and self.check_slack_frontmost():
+                    if domain == 'slack.com' and self.check_slack_frontmost(front_app):
                         self.send_terminal_notification(
                             session['id'],
                             'slack.com',
@@ -271,7 +466,7 @@ class TaviblockDaemon:
                         logger.info(f"Notified about Slack closing (session {session['id']})")
                         self.notified_sessions.add(session['id'])
                         break
-                    elif self.check_active_chrome_tab(domain):
+                    elif self.check_active_chrome_tab(domain, active_url):
                         self.send_terminal_notification(
                             session['id'],
                             domain,
@@ -307,16 +502,13 @@ class TaviblockDaemon:
         except:
             return 0
     
-    def process_queued_sessions(self):
+    def process_queued_sessions(self, unblocked_domains):
         """Check queued sessions and activate them if their target domains are now blocked."""
         try:
             queued_sessions = db.get_queued_sessions()
             if not queued_sessions:
                 return
             
-            # Get currently unblocked domains
-            unblocked_domains = set(db.get_all_unblocked_domains())
-            
             for session in queued_sessions:
                 # Check if all queued_for_domains are now blocked (not in unblocked set)
                 queued_for = set(session['queued_for_domains'])
@@ -345,69 +537,119 @@ class TaviblockDaemon:
         except Exception as e:
             logger.error(f"Error processing queued sessions: {e}")
     
+    def write_pidfile(self):
+        """Record our pid so the CLI can check liveness cheaply."""
+        try:
+            PID_PATH.write_text(f"{os.getpid()}\n")
+        except Exception as e:
+            logger.error(f"Error writing pidfile: {e}")
+    
+    def remove_pidfile(self):
+        """Remove the pidfile on clean shutdown."""
+        try:
+            PID_PATH.unlink()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error removing pidfile: {e}")
+    
     def run(self):
         """Main daemon loop."""
         logger.info("Taviblock daemon started")
+        self.write_pidfile()
         
         # Initialize database
         db.init_db()
+        self.open_wake_socket()
+        self.watch_files()
+        self.compile_scripts()
         
         # Main loop
         last_update = None
         while self.running:
+            self._tick_cache.clear()
+            timeout = 1
             try:
-                # Clean expired sessions
-                db.clean_expired_sessions()
+                current_time = time.time()
+                
+                # Clean expired sessions and fetch what's still active in one go
+                active_sessions = db.clean_and_fetch_active(current_time)
+                unblocked_domains = db.get_all_unblocked_domains(active_sessions)
                 
                 # Check for queued sessions that can now start
-                self.process_queued_sessions()
+                self.process_queued_sessions(unblocked_domains)
                 
                 # Get current state
-                domains_to_block = self.get_domains_to_block()
+                domains_to_block = self.get_domains_to_block(unblocked_domains)
                 
                 # Only update if something changed or it's the first run
                 current_state = frozenset(domains_to_block)
-                if last_update != current_state:
+                changed = last_update != current_state
+                sweep_due = current_time - self.last_enforce >= self.enforce_interval
+                
+                # Also rewrite when /etc/hosts was edited behind our back; the
+                # periodic sweep re-checks it where file watches are unavailable
+                hosts_dirty, self._hosts_dirty = self._hosts_dirty, False
+                if changed or hosts_dirty or sweep_due:
                     self.update_hosts_file(domains_to_block)
                     last_update = current_state
                 
+                # Enforce blocks by closing tabs/apps when the block set changes,
+                # plus a periodic sweep for tabs opened since
+                if changed or sweep_due:
+                    self.enforce_blocks(domains_to_block)
+                    self.last_enforce = current_time
+                
                 # Check if it's time to run AppleScript operations (every 5 seconds)
-                current_time = time.time()
                 if current_time - self.last_applescript_check >= self.applescript_interval:
-                    # Enforce blocks by closing tabs/apps
-                    self.enforce_blocks(domains_to_block)
-                    
                     # Check for sessions ending soon
-                    self.check_ending_sessions()
+                    self.check_ending_sessions(active_sessions, current_time)
                     
                     self.last_applescript_check = current_time
                 
-                # Log active sessions periodically
-                active_sessions = db.get_active_sessions()
-                if active_sessions:
+                # Log active sessions periodically (skipped entirely below DEBUG)
+                if active_sessions and logger.isEnabledFor(logging.DEBUG):
                     logger.debug(f"Active sessions: {len(active_sessions)}")
                     for session in active_sessions:
-                        remaining = session['end_time'] - datetime.now().timestamp()
+                        remaining = session['end_time'] - current_time
                         logger.debug(f"  - {session['session_type']}: {session['domains']} ({int(remaining/60)} min remaining)")
                 
+                # Work out how long we can sleep before anything is due
+                timeout = self.seconds_until_next_event(time.time(), active_sessions)
             except Exception as e:
                 logger.error(f"Error in main loop: {e}")
             
-            # Sleep for 1 second before next check
-            time.sleep(1)
+            # Sleep until something can change, retrying after 1 second on errors
+            LOG_BUFFER.flush()
+            if self.running:
+                self.wait_for_event(timeout)
         
         # Restore full blocking on shutdown - critical safety feature
         logger.info("Restoring full blocking before shutdown")
         all_domains = self.config.get_all_domains()
         self.update_hosts_file(all_domains)
+        self.close_wake_socket()
+        self.unwatch_files()
+        self.remove_compiled_scripts()
+        self.remove_pidfile()
         logger.info("Taviblock daemon stopped")
 
+def limit_open_files():
+    """Lower the soft RLIMIT_NOFILE to MAX_OPEN_FILES if it is higher."""
+    try:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft == resource.RLIM_INFINITY or soft > MAX_OPEN_FILES:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (MAX_OPEN_FILES, hard))
+    except (ValueError, OSError) as e:
+        logger.warning(f"Could not lower open file limit: {e}")
+
 def main():
     """Entry point for the daemon."""
     if os.geteuid() != 0:
         print("This daemon must be run as root")
         sys.exit(1)
     
+    limit_open_files()
     daemon = TaviblockDaemon()
     daemon.run()
 
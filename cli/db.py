@@ -1,32 +1,89 @@
 #!/usr/bin/python3
 import sqlite3
 import os
-from datetime import datetime, timedelta
+import atexit
+import time
 from pathlib import Path
 import json
+import hashlib
+import socket
+from functools import lru_cache
 
 # Database location
 DB_DIR = Path("/var/lib/taviblock")
 DB_PATH = DB_DIR / "state.db"
 
+# Datagram socket the daemon listens on to wake up when sessions change
+DAEMON_SOCKET_PATH = "/var/run/taviblock.sock"
+
 def ensure_db_exists():
     """Ensure the database directory and file exist with proper permissions."""
     if not DB_DIR.exists():
         DB_DIR.mkdir(parents=True, exist_ok=True)
         os.chmod(DB_DIR, 0o755)
     
+# One autocommit connection per process, shared by every helper below
+_shared_conn = None
+_shared_path = None
+
+def _is_open(conn):
+    """Check whether a connection is still usable."""
+    try:
+        conn.in_transaction
+    except sqlite3.ProgrammingError:
+        return False
+    return True
+
 def get_connection():
-    """Get a connection to the database."""
-    ensure_db_exists()
-    conn = sqlite3.connect(str(DB_PATH))
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Get the process-wide connection to the database.
+    
+    The connection is reopened if DB_PATH changes or a caller closed it.
+    """
+    global _shared_conn, _shared_path
+    path = str(DB_PATH)
+    if _shared_conn is None or _shared_path != path or not _is_open(_shared_conn):
+        if _shared_conn is not None:
+            _shared_conn.close()
+        ensure_db_exists()
+        conn = sqlite3.connect(path, cached_statements=256, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        # WAL makes NORMAL durable across crashes, so skip the per-commit fsync
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=67108864")
+        conn.execute("PRAGMA cache_size=-20000")
+        # session_domains rows are removed through ON DELETE CASCADE
+        conn.execute("PRAGMA foreign_keys=ON")
+        _shared_conn = conn
+        _shared_path = path
+    return _shared_conn
+
+@atexit.register
+def close_connection():
+    """Close the shared connection, letting SQLite checkpoint the WAL on exit."""
+    global _shared_conn, _shared_path
+    if _shared_conn is not None:
+        _shared_conn.close()
+        _shared_conn = None
+        _shared_path = None
+
+def notify_daemon():
+    """Wake the daemon so it applies session changes right away."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.sendto(b"\0", DAEMON_SOCKET_PATH)
+    except OSError:
+        # Daemon not running; it picks the change up when it starts
+        pass
 
 def init_db():
     """Initialize the database schema."""
     conn = get_connection()
     cursor = conn.cursor()
     
+    # Write-ahead logging persists in the database file once set
+    cursor.execute("PRAGMA journal_mode=WAL")
+    
     # Table for active unblock sessions
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS unblock_sessions (
@@ -39,7 +96,8 @@ def init_db():
             created_at REAL NOT NULL,
             is_all_domains INTEGER DEFAULT 0,  -- 1 if this session unblocks all domains
             queued_for_domains TEXT,  -- JSON array of domains this is queued for (waiting for them to be blocked again)
-            target_name TEXT  -- Human-friendly name like 'slack' or 'gmail'
+            target_name TEXT,  -- Human-friendly name like 'slack' or 'gmail'
+            domains_hash TEXT  -- domains_hash() of the domain list, for duplicate lookups
         )
     """)
     
@@ -59,50 +117,124 @@ def init_db():
         )
     """)
     
+    # Live-session lookups range over end_time and check wait_until from the
+    # same index. end_time leads, so this also serves every query the old
+    # end_time-only index did; drop that one rather than maintain both.
+    cursor.execute("DROP INDEX IF EXISTS idx_sessions_end_time")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_end_wait ON unblock_sessions(end_time, wait_until)")
+    # Pending lookups filter on wait_until
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_wait_until ON unblock_sessions(wait_until)")
+    
     # Add migration for existing databases
     try:
         cursor.execute("ALTER TABLE unblock_sessions ADD COLUMN is_all_domains INTEGER DEFAULT 0")
-        conn.commit()
     except sqlite3.OperationalError:
         # Column already exists
         pass
     
     try:
         cursor.execute("ALTER TABLE unblock_sessions ADD COLUMN queued_for_domains TEXT")
-        conn.commit()
     except sqlite3.OperationalError:
         # Column already exists
         pass
     
     try:
         cursor.execute("ALTER TABLE unblock_sessions ADD COLUMN target_name TEXT")
-        conn.commit()
     except sqlite3.OperationalError:
         # Column already exists
         pass
     
-    conn.commit()
-    conn.close()
+    try:
+        cursor.execute("ALTER TABLE unblock_sessions ADD COLUMN domains_hash TEXT")
+        # Backfill sessions created before the column existed
+        for row in cursor.execute("SELECT id, domains FROM unblock_sessions").fetchall():
+            conn.execute("UPDATE unblock_sessions SET domains_hash = ? WHERE id = ?",
+                         (domains_hash(json.loads(row['domains'])), row['id']))
+    except sqlite3.OperationalError:
+        # Column already exists
+        pass
+    
+    # Indexes on migrated columns must come after the migrations above
+    
+    # Queued lookups scan only queued rows
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_sessions_queued ON unblock_sessions(created_at)
+        WHERE queued_for_domains IS NOT NULL
+    """)
+    # Duplicate checks never match bypass sessions, so leave them out of the index
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_sessions_domains_hash ON unblock_sessions(domains_hash)
+        WHERE session_type != 'bypass'
+    """)
+    # Covering index for penalty.get_daily_stats' count: a range scan on
+    # created_at with the other filters answered without touching table rows
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_sessions_daily
+        ON unblock_sessions(created_at, queued_for_domains, session_type)
+    """)
+    
+    # One row per (session, domain) so the unblocked set is a single indexed query
+    has_session_domains = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'session_domains'"
+    ).fetchone()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS session_domains (
+            session_id INTEGER NOT NULL REFERENCES unblock_sessions(id) ON DELETE CASCADE,
+            domain TEXT NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sd_session ON session_domains(session_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sd_domain ON session_domains(domain)")
+    if not has_session_domains:
+        # Backfill sessions created before the table existed
+        cursor.executemany(
+            "INSERT INTO session_domains (session_id, domain) VALUES (?, ?)",
+            [(row['id'], domain)
+             for row in cursor.execute("SELECT id, domains FROM unblock_sessions").fetchall()
+             for domain in json.loads(row['domains'])])
+
+@lru_cache(maxsize=256)
+def _parse_domains(raw):
+    """Decode a domains column value into a tuple, caching by the raw JSON text."""
+    return tuple(json.loads(raw))
+
+def decode_domains(raw):
+    """Decode a domains column value into a fresh list.
+    
+    The same sessions are read on every daemon tick, so the JSON is parsed
+    once per distinct value and later reads only copy the cached tuple.
+    """
+    return list(_parse_domains(raw))
+
+def domains_hash(domains):
+    """Hash a domain collection independently of order."""
+    return hashlib.blake2b(",".join(sorted(set(domains))).encode(), digest_size=8).hexdigest()
 
 def add_unblock_session(domains, duration_minutes, wait_minutes=0, session_type='single', is_all_domains=False, queued_for_domains=None, target_name=None):
     """Add a new unblock session."""
     conn = get_connection()
     cursor = conn.cursor()
     
-    now = datetime.now().timestamp()
+    now = time.time()
     wait_until = now + (wait_minutes * 60) if wait_minutes > 0 else now
     end_time = wait_until + (duration_minutes * 60)
     
-    cursor.execute("""
-        INSERT INTO unblock_sessions (domains, start_time, end_time, wait_until, session_type, created_at, is_all_domains, queued_for_domains, target_name)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (json.dumps(domains), now, end_time, wait_until, session_type, now, 1 if is_all_domains else 0, 
-          json.dumps(queued_for_domains) if queued_for_domains else None, target_name))
-    
-    session_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    
+    cursor.execute("BEGIN")
+    try:
+        cursor.execute("""
+            INSERT INTO unblock_sessions (domains, start_time, end_time, wait_until, session_type, created_at, is_all_domains, queued_for_domains, target_name, domains_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (json.dumps(domains), now, end_time, wait_until, session_type, now, 1 if is_all_domains else 0, 
+              json.dumps(queued_for_domains) if queued_for_domains else None, target_name, domains_hash(domains)))
+        session_id = cursor.lastrowid
+        cursor.executemany("INSERT INTO session_domains (session_id, domain) VALUES (?, ?)",
+                           [(session_id, domain) for domain in set(domains)])
+        cursor.execute("COMMIT")
+    except Exception:
+        cursor.execute("ROLLBACK")
+        raise
+    
+    notify_daemon()
     return session_id
 
 def get_active_sessions():
@@ -110,21 +242,20 @@ def get_active_sessions():
     conn = get_connection()
     cursor = conn.cursor()
     
-    now = datetime.now().timestamp()
+    now = time.time()
     
     cursor.execute("""
         SELECT * FROM unblock_sessions 
-        WHERE end_time > ? AND wait_until <= ?
+        WHERE end_time > ? AND wait_until <= ? AND queued_for_domains IS NULL
         ORDER BY end_time DESC
     """, (now, now))
     
     sessions = []
     for row in cursor.fetchall():
         session = dict(row)
-        session['domains'] = json.loads(session['domains'])
+        session['domains'] = decode_domains(session['domains'])
         sessions.append(session)
     
-    conn.close()
     return sessions
 
 def get_pending_sessions():
@@ -132,7 +263,7 @@ def get_pending_sessions():
     conn = get_connection()
     cursor = conn.cursor()
     
-    now = datetime.now().timestamp()
+    now = time.time()
     
     cursor.execute("""
         SELECT * FROM unblock_sessions 
@@ -143,12 +274,96 @@ def get_pending_sessions():
     sessions = []
     for row in cursor.fetchall():
         session = dict(row)
-        session['domains'] = json.loads(session['domains'])
+        session['domains'] = decode_domains(session['domains'])
         sessions.append(session)
     
-    conn.close()
     return sessions
 
+def get_live_sessions():
+    """Get active and pending sessions with a single query.
+    
+    Returns:
+        Tuple of (active sessions, pending sessions), ordered the same way
+        as get_active_sessions() and get_pending_sessions().
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    now = time.time()
+    
+    cursor.execute("""
+        SELECT * FROM unblock_sessions 
+        WHERE end_time > ? AND queued_for_domains IS NULL
+    """, (now,))
+    
+    active = []
+    pending = []
+    for row in cursor.fetchall():
+        session = dict(row)
+        session['domains'] = decode_domains(session['domains'])
+        if session['wait_until'] <= now:
+            active.append(session)
+        else:
+            pending.append(session)
+    
+    active.sort(key=lambda s: s['end_time'], reverse=True)
+    pending.sort(key=lambda s: s['wait_until'])
+    return active, pending
+
+def find_session_by_domains(domains):
+    """Find a live, non-bypass session covering exactly the given domains.
+    
+    Candidates are narrowed by domains_hash() and then compared domain for
+    domain, so a hash collision never returns another session. Active
+    sessions are preferred over pending ones. Returns None when no session
+    matches.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    now = time.time()
+    requested = set(domains)
+    
+    cursor.execute("""
+        SELECT * FROM unblock_sessions 
+        WHERE domains_hash = ? AND session_type != 'bypass'
+          AND end_time > ? AND queued_for_domains IS NULL
+        ORDER BY wait_until ASC
+    """, (domains_hash(requested), now))
+    
+    for row in cursor:
+        session = dict(row)
+        session['domains'] = decode_domains(session['domains'])
+        if set(session['domains']) == requested:
+            return session
+    
+    return None
+
+def get_next_deadline(notify_lead=65, now=None):
+    """Get the next time a session starts, ends, or enters its end warning.
+    
+    The warning deadline is notify_lead seconds before a non-bypass session
+    ends. Returns None when no such time lies in the future.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    if now is None:
+        now = time.time()
+    
+    cursor.execute("""
+        SELECT MIN(deadline) FROM (
+            SELECT wait_until AS deadline FROM unblock_sessions WHERE wait_until > ?
+            UNION ALL
+            SELECT end_time FROM unblock_sessions WHERE end_time > ?
+            UNION ALL
+            SELECT end_time - ? FROM unblock_sessions
+            WHERE end_time > ? AND session_type != 'bypass'
+        )
+    """, (now, now, notify_lead, now + notify_lead))
+    
+    return cursor.fetchone()[0]
+
 def get_queued_sessions():
     """Get sessions that are queued (waiting for domains to be blocked again)."""
     conn = get_connection()
@@ -163,34 +378,78 @@ def get_queued_sessions():
     sessions = []
     for row in cursor.fetchall():
         session = dict(row)
-        session['domains'] = json.loads(session['domains'])
+        session['domains'] = decode_domains(session['domains'])
         session['queued_for_domains'] = json.loads(session['queued_for_domains']) if session['queued_for_domains'] else None
         sessions.append(session)
     
-    conn.close()
     return sessions
 
-def get_all_unblocked_domains():
-    """Get the union of all domains from active sessions."""
-    sessions = get_active_sessions()
+def get_all_unblocked_domains(sessions=None):
+    """Get the sorted union of all domains from active sessions.
+    
+    Callers that already hold the decoded active sessions can pass them in
+    to skip the query.
+    """
+    if sessions is None:
+        now = time.time()
+        cursor = get_connection().execute("""
+            SELECT DISTINCT sd.domain FROM session_domains sd
+            JOIN unblock_sessions s ON s.id = sd.session_id
+            WHERE s.end_time > ? AND s.wait_until <= ? AND s.queued_for_domains IS NULL
+            ORDER BY sd.domain
+        """, (now, now))
+        return [row[0] for row in cursor]
     all_domains = set()
     
     for session in sessions:
         all_domains.update(session['domains'])
     
-    return list(all_domains)
+    return sorted(all_domains)
 
 def clean_expired_sessions():
     """Remove expired sessions from the database."""
     conn = get_connection()
     cursor = conn.cursor()
     
-    now = datetime.now().timestamp()
+    now = time.time()
     # Only delete sessions that have actually started (not queued ones)
     cursor.execute("DELETE FROM unblock_sessions WHERE end_time <= ? AND queued_for_domains IS NULL", (now,))
+
+def clean_and_fetch_active(now=None):
+    """Remove expired sessions and return the active ones in one transaction.
+    
+    Equivalent to clean_expired_sessions() followed by get_active_sessions(),
+    except that only the columns the daemon reads are fetched: id, domains,
+    end_time, wait_until and session_type.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    if now is None:
+        now = time.time()
+    
+    cursor.execute("BEGIN")
+    try:
+        # Only delete sessions that have actually started (not queued ones)
+        cursor.execute("DELETE FROM unblock_sessions WHERE end_time <= ? AND queued_for_domains IS NULL", (now,))
+        cursor.execute("""
+            SELECT id, domains, end_time, wait_until, session_type FROM unblock_sessions 
+            WHERE end_time > ? AND wait_until <= ? AND queued_for_domains IS NULL
+            ORDER BY end_time DESC
+        """, (now, now))
+        rows = cursor.fetchall()
+        cursor.execute("COMMIT")
+    except Exception:
+        cursor.execute("ROLLBACK")
+        raise
+    
+    sessions = []
+    for row in rows:
+        session = dict(row)
+        session['domains'] = decode_domains(session['domains'])
+        sessions.append(session)
     
-    conn.commit()
-    conn.close()
+    return sessions
 
 def check_profile_cooldown(profile_name, cooldown_minutes=0):
     """Check if a profile is available (no cooldown or cooldown expired)."""
@@ -201,19 +460,16 @@ def check_profile_cooldown(profile_name, cooldown_minutes=0):
     row = cursor.fetchone()
     
     if not row or cooldown_minutes == 0:
-        conn.close()
         return True, 0
     
     last_used = row['last_used']
-    now = datetime.now().timestamp()
+    now = time.time()
     cooldown_seconds = cooldown_minutes * 60
     
     if now - last_used >= cooldown_seconds:
-        conn.close()
         return True, 0
     else:
         remaining = int(cooldown_seconds - (now - last_used))
-        conn.close()
         return False, remaining
 
 def set_profile_cooldown(profile_name, cooldown_minutes):
@@ -224,12 +480,9 @@ def set_profile_cooldown(profile_name, cooldown_minutes):
     conn = get_connection()
     cursor = conn.cursor()
     
-    now = datetime.now().timestamp()
+    now = time.time()
     cursor.execute("INSERT OR REPLACE INTO profile_cooldowns (profile_name, last_used) VALUES (?, ?)", 
                   (profile_name, now))
-    
-    conn.commit()
-    conn.close()
 
 def cancel_session(session_id):
     """Cancel a specific session."""
@@ -238,8 +491,28 @@ def cancel_session(session_id):
     
     cursor.execute("DELETE FROM unblock_sessions WHERE id = ?", (session_id,))
     
-    conn.commit()
-    conn.close()
+    notify_daemon()
+
+def cancel_sessions(session_ids):
+    """Cancel several sessions in a single transaction."""
+    if not session_ids:
+        return
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    # One fixed statement reused per id, so it stays in the statement cache
+    # however many sessions are cancelled
+    cursor.execute("BEGIN")
+    try:
+        cursor.executemany("DELETE FROM unblock_sessions WHERE id = ?",
+                           [(session_id,) for session_id in session_ids])
+        cursor.execute("COMMIT")
+    except Exception:
+        cursor.execute("ROLLBACK")
+        raise
+    
+    notify_daemon()
 
 def get_session_info(session_id):
     """Get information about a specific session."""
@@ -251,11 +524,9 @@ def get_session_info(session_id):
     
     if row:
         session = dict(row)
-        session['domains'] = json.loads(session['domains'])
-        conn.close()
+        session['domains'] = decode_domains(session['domains'])
         return session
     
-    conn.close()
     return None
 
 def extend_session(session_id, new_end_time):
@@ -266,15 +537,14 @@ def extend_session(session_id, new_end_time):
     cursor.execute("UPDATE unblock_sessions SET end_time = ? WHERE id = ?", 
                    (new_end_time, session_id))
     
-    conn.commit()
-    conn.close()
+    notify_daemon()
 
 def activate_queued_session(session_id, wait_minutes):
     """Convert a queued session to a regular pending session."""
     conn = get_connection()
     cursor = conn.cursor()
     
-    now = datetime.now().timestamp()
+    now = time.time()
     new_wait_until = now + (wait_minutes * 60)
     
     # Get current session to calculate new end time
@@ -294,10 +564,6 @@ def activate_queued_session(session_id, wait_minutes):
                 start_time = ?
             WHERE id = ?
         """, (new_wait_until, new_end_time, now, session_id))
-        
-        conn.commit()
-    
-    conn.close()
 
 if __name__ == "__main__":
     # Initialize the database if run directly
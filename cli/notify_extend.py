@@ -40,23 +40,30 @@ def main():
     print()
     
     # Use a simple timeout mechanism
-    import select
+    import signal
     import termios
     import tty
     
+    def on_timeout(signum, frame):
+        raise TimeoutError
+    
     # Save terminal settings
     old_settings = termios.tcgetattr(sys.stdin)
     
     try:
-        tty.setraw(sys.stdin.fileno())
+        # cbreak delivers single keypresses but keeps Ctrl+C working, and
+        # the finally below restores the terminal either way
+        tty.setcbreak(sys.stdin.fileno())
         
         # Wait for input with timeout
-        ready, _, _ = select.select([sys.stdin], [], [], 30)
-        
-        if ready:
+        signal.signal(signal.SIGALRM, on_timeout)
+        signal.alarm(30)
+        try:
             choice = sys.stdin.read(1)
-        else:
+        except TimeoutError:
             choice = '3'  # Default to doing nothing
+        finally:
+            signal.alarm(0)
     finally:
         # Restore terminal settings
         termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings)
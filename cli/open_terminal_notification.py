@@ -6,6 +6,7 @@ Detects and uses the user's preferred terminal (iTerm2 or Terminal.app).
 import sys
 import os
 import subprocess
+import shlex
 
 def check_iterm_installed():
     """Check if iTerm2 is installed."""
@@ -16,30 +17,38 @@ def check_iterm_installed():
     except:
         return False
 
+def build_command(script_path, args):
+    """Build the shell command line the terminal should run."""
+    return shlex.join(['python3', script_path, *args])
+
+def run_with_command(lines, cmd):
+    """Run AppleScript lines with cmd available as the variable "cmd".
+    
+    The command travels through the environment rather than being pasted
+    into the script source, so quotes in domain names can't break it.
+    """
+    argv = ['osascript', '-e', 'set cmd to system attribute "TAVIBLOCK_CMD"']
+    for line in lines:
+        argv += ['-e', line]
+    subprocess.run(argv, env={**os.environ, 'TAVIBLOCK_CMD': cmd})
+
 def open_iterm_notification(script_path, args):
     """Open notification in iTerm2."""
-    applescript = f'''
-    tell application "iTerm"
-        create window with default profile
-        tell current session of current window
-            write text "python3 {script_path} {' '.join(args)}"
-        end tell
-    end tell
-    '''
-    subprocess.run(['osascript', '-e', applescript])
+    run_with_command([
+        'tell application "iTerm"',
+        'create window with default profile',
+        'tell current session of current window to write text cmd',
+        'end tell',
+    ], build_command(script_path, args))
 
 def open_terminal_notification(script_path, args):
     """Open notification in Terminal.app."""
-    # Build the command
-    cmd = f'python3 {script_path} {" ".join(args)}'
-    
-    applescript = f'''
-    tell application "Terminal"
-        do script "{cmd}"
-        activate
-    end tell
-    '''
-    subprocess.run(['osascript', '-e', applescript])
+    run_with_command([
+        'tell application "Terminal"',
+        'do script cmd',
+        'activate',
+        'end tell',
+    ], build_command(script_path, args))
 
 def main():
     if len(sys.argv) < 4:
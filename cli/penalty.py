@@ -3,54 +3,92 @@
 
 import json
 from datetime import datetime, time, timedelta
+from functools import lru_cache
+from time import monotonic
 from cli import db
 
+# Seconds a memoized get_daily_stats result may be reused
+STATS_TTL = 30
 
-def get_daily_stats(config=None):
-    """Get unblock statistics for today"""
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    
-    now = datetime.now()
-    today_4am = datetime.combine(now.date(), time(4, 0))
-    if now.hour < 4:
+# (connection, its total_changes, data_version, period start, excluded profiles,
+#  expiry, stats)
+_stats_cache = None
+
+
+@lru_cache(maxsize=2)
+def _period_bounds(day, before_4am):
+    """Return (period start, next reset) timestamps for a date and hour bucket"""
+    today_4am = datetime.combine(day, time(4, 0))
+    if before_4am:
         # If it's before 4am, we're still in "yesterday's" period
         today_4am -= timedelta(days=1)
     
     # The period we're currently in started at today_4am
-    current_period_start = today_4am.timestamp()
-    next_reset = (today_4am + timedelta(days=1)).timestamp()
-    
-    # Get excluded profiles from config
-    exclude_profiles = []
-    if config:
-        penalty_config = config.data.get('progressive_penalty', {})
-        exclude_profiles = penalty_config.get('exclude_profiles', [])
+    return today_4am.timestamp(), (today_4am + timedelta(days=1)).timestamp()
+
+
+@lru_cache(maxsize=8)
+def _daily_count_sql(exclude_count):
+    """Build the daily count query for a number of excluded profiles
     
+    Cached so the same text object is reused, which also keeps sqlite3's
+    statement cache hitting the already-prepared statement.
+    """
     # Build SQL query with proper parameter placeholders
-    placeholders = ','.join('?' * len(exclude_profiles)) if exclude_profiles else ''
-    exclude_clause = f"AND session_type NOT IN ({placeholders})" if exclude_profiles else ""
+    placeholders = ','.join('?' * exclude_count)
+    exclude_clause = f"AND session_type NOT IN ({placeholders})" if exclude_count else ""
     
     # Count unblocks since the start of current period (excluding configured profiles)
-    query = f"""
+    return f"""
         SELECT COUNT(*) as count 
         FROM unblock_sessions 
         WHERE created_at > ? 
         AND queued_for_domains IS NULL 
         {exclude_clause}
     """
+
+
+def get_daily_stats(config=None):
+    """Get unblock statistics for today
+    
+    Results are reused for up to STATS_TTL seconds, until any process
+    writes to the database or the period rolls over. total_changes counts
+    this connection's writes and PRAGMA data_version moves on commits from
+    every other connection, so together they catch all of them.
+    """
+    global _stats_cache
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    
+    now = datetime.now()
+    current_period_start, next_reset = _period_bounds(now.date(), now.hour < 4)
+    
+    # Get excluded profiles from config
+    exclude_profiles = []
+    if config:
+        penalty_config = config.data.get('progressive_penalty', {})
+        exclude_profiles = penalty_config.get('exclude_profiles', [])
+    
+    data_version = cursor.execute("PRAGMA data_version").fetchone()[0]
+    key = (conn, conn.total_changes, data_version, current_period_start, tuple(exclude_profiles))
+    if _stats_cache is not None and _stats_cache[:5] == key and _stats_cache[5] > monotonic():
+        return dict(_stats_cache[6])
+    
+    query = _daily_count_sql(len(exclude_profiles))
     
     params = [current_period_start] + exclude_profiles
     cursor.execute(query, params)
     
     count = cursor.fetchone()['count']
-    conn.close()
     
-    return {
+    stats = {
         'count': count,
         'last_reset': current_period_start,
         'next_reset': next_reset
     }
+    # The shared connection stays open; closing it would defeat the cache key
+    _stats_cache = key + (monotonic() + STATS_TTL, stats)
+    return dict(stats)
 
 
 def get_progressive_penalty(config):
@@ -60,8 +98,11 @@ def get_progressive_penalty(config):
     if not penalty_config.get('enabled', False):
         return 0
     
-    stats = get_daily_stats(config)
-    
+    return _penalty_minutes_from_stats(get_daily_stats(config), penalty_config)
+
+
+def _penalty_minutes_from_stats(stats, penalty_config):
+    """Penalty in minutes for the unblocks counted in stats"""
     # Calculate penalty based on unblocks in current period
     per_unblock_seconds = penalty_config.get('per_unblock', 10)
     penalty_seconds = stats['count'] * per_unblock_seconds
@@ -89,7 +130,7 @@ def get_penalty_status(config):
         return None
     
     stats = get_daily_stats(config)
-    penalty_minutes = get_progressive_penalty(config)
+    penalty_minutes = _penalty_minutes_from_stats(stats, penalty_config)
     
     # Time until next reset
     next_reset = datetime.fromtimestamp(stats['next_reset'])
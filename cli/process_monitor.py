@@ -26,17 +26,19 @@ class ProcessMonitor:
         self.daemon_plist = "/Library/LaunchDaemons/com.taviblock.daemon.plist"
         self.watchdog_plist = "/Library/LaunchDaemons/com.taviblock.watchdog.plist"
         
-    def check_process_running(self, process_name):
-        """Check if a process is running."""
+    def check_process_running(self, pid):
+        """Check if a launchd PID column value names a live process."""
+        if not pid.isdigit():
+            return False
         try:
-            result = subprocess.run(
-                ['pgrep', '-f', process_name],
-                capture_output=True,
-                text=True
-            )
-            return result.returncode == 0
-        except:
+            # Signal 0 only checks that the process exists
+            os.kill(int(pid), 0)
+            return True
+        except ProcessLookupError:
             return False
+        except PermissionError:
+            # Exists but belongs to another user
+            return True
     
     def check_launchd_service(self, service_name):
         """Check if a launchd service is loaded."""
@@ -49,6 +51,22 @@ class ProcessMonitor:
         except:
             return False
     
+    def list_launchd_services(self):
+        """Map each loaded launchd label to the PID column of `launchctl list`.
+        
+        The column holds "-" for services that are loaded but not running.
+        """
+        result = subprocess.run(['launchctl', 'list'], capture_output=True, text=True)
+        if result.returncode != 0:
+            # Don't mistake a failed listing for both services being unloaded
+            raise RuntimeError(f"launchctl list failed: {result.stderr.strip()}")
+        services = {}
+        for line in result.stdout.splitlines():
+            fields = line.split('\t')
+            if len(fields) == 3:
+                services[fields[2]] = fields[0]
+        return services
+    
     def load_launchd_service(self, plist_path, service_name):
         """Load a launchd service."""
         try:
@@ -74,32 +92,55 @@ class ProcessMonitor:
             return False
     
     def ensure_services_running(self):
-        """Ensure both daemon and watchdog are running."""
+        """Ensure both daemon and watchdog are running.
+        
+        Returns:
+            True if both were already healthy, False if one needed a restart
+        """
+        # One `launchctl list` answers the loaded and running checks for both services
+        services = self.list_launchd_services()
+        
+        healthy = True
+        
         # Check daemon
-        if not self.check_launchd_service('com.taviblock.daemon'):
+        if 'com.taviblock.daemon' not in services:
             logger.warning("Daemon service not loaded, reloading...")
+            healthy = False
             self.load_launchd_service(self.daemon_plist, 'com.taviblock.daemon')
-        elif not self.check_process_running('daemon.py'):
+        elif not self.check_process_running(services['com.taviblock.daemon']):
             logger.warning("Daemon process not running, restarting service...")
+            healthy = False
             subprocess.run(['launchctl', 'kickstart', '-k', 'system/com.taviblock.daemon'])
         
         # Check watchdog
-        if not self.check_launchd_service('com.taviblock.watchdog'):
+        if 'com.taviblock.watchdog' not in services:
             logger.warning("Watchdog service not loaded, reloading...")
+            healthy = False
             self.load_launchd_service(self.watchdog_plist, 'com.taviblock.watchdog')
-        elif not self.check_process_running('watchdog.py'):
+        elif not self.check_process_running(services['com.taviblock.watchdog']):
             logger.warning("Watchdog process not running, restarting service...")
+            healthy = False
             subprocess.run(['launchctl', 'kickstart', '-k', 'system/com.taviblock.watchdog'])
+        
+        return healthy
     
     def run(self):
         """Main monitoring loop."""
         logger.info("Process monitor started")
         
+        healthy_checks = 0
         while True:
             try:
-                self.ensure_services_running()
-                time.sleep(5)  # Check every 5 seconds
+                if self.ensure_services_running():
+                    # Back off 5, 10, 20, then 40 seconds while all is well
+                    time.sleep(5 * (1 << min(healthy_checks, 3)))
+                    healthy_checks += 1
+                else:
+                    # Re-check soon after a restart to catch flapping
+                    healthy_checks = 0
+                    time.sleep(1)
             except Exception as e:
+                healthy_checks = 0
                 logger.error(f"Error in monitor loop: {e}")
                 time.sleep(10)
 
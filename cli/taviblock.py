@@ -2,12 +2,15 @@
 import argparse
 import sys
 import os
-from datetime import datetime, timedelta
+import time
 from pathlib import Path
 import json
 import subprocess
+from functools import lru_cache
+from itertools import chain
 
 from cli import db
+from cli.common import format_time_remaining, generate_block_text
 from cli.config_loader import Config
 
 # Path to the system hosts file on macOS
@@ -15,6 +18,9 @@ HOSTS_PATH = "/etc/hosts"
 # Markers to delimit our managed block section in /etc/hosts
 BLOCKER_START = "# BLOCKER START"
 BLOCKER_END = "# BLOCKER END"
+# Byte forms of the markers for splice_hosts, which works on raw file contents
+BLOCKER_START_B = BLOCKER_START.encode()
+BLOCKER_END_B = BLOCKER_END.encode()
 
 
 def require_admin():
@@ -24,55 +30,109 @@ def require_admin():
         sys.exit(1)
 
 
-def generate_block_entries(domains):
-    """Generate hosts file entries for IPv4 and IPv6."""
-    entries = []
-    common_subdomains = ["www", "m", "mobile", "login", "app", "api"]
-
-    for domain in domains:
-        domain = domain.strip()
-        if not domain:
-            continue
-        parts = domain.split(".")
-        if len(parts) == 2:  # root domain
-            entries.append(f"127.0.0.1 {domain}")
-            entries.append(f"::1 {domain}")
-            for prefix in common_subdomains:
-                subdomain = f"{prefix}.{domain}"
-                entries.append(f"127.0.0.1 {subdomain}")
-                entries.append(f"::1 {subdomain}")
-        else:
-            entries.append(f"127.0.0.1 {domain}")
-            entries.append(f"::1 {domain}")
-    return entries
-
-
-def format_time_remaining(seconds):
-    """Format seconds into human-readable time."""
-    if seconds < 60:
-        return f"{int(seconds)} seconds"
-    elif seconds <= 300:  # 5 minutes or less, show minutes and seconds
-        minutes = int(seconds / 60)
-        secs = int(seconds % 60)
-        if secs > 0:
-            return f"{minutes} minute{'s' if minutes != 1 else ''} {secs} second{'s' if secs != 1 else ''}"
-        else:
-            return f"{minutes} minute{'s' if minutes != 1 else ''}"
-    elif seconds < 3600:
-        minutes = int(seconds / 60)
-        return f"{minutes} minute{'s' if minutes != 1 else ''}"
+@lru_cache(maxsize=8)
+def _block_body(domains):
+    """Encoded hosts entries for a frozenset of domains.
+    
+    Cached so the periodic sweep and hosts-file repairs reuse the bytes
+    built for an unchanged block set.
+    """
+    # Sorted so the same block set always produces the same bytes
+    return generate_block_text(sorted(domains)).encode()
+
+
+def read_hosts(path):
+    """Read a hosts file.
+    
+    Returns:
+        Tuple of (raw contents, permission bits)
+    """
+    with open(path, 'rb') as f:
+        return f.read(), os.fstat(f.fileno()).st_mode & 0o7777
+
+
+def _find_marker_line(data, marker, pos=0):
+    """Return (start, end) offsets of the next line at or after pos that is marker.
+    
+    Like the old line-by-line parser, only a line whose stripped contents
+    equal the marker counts; end is just past its newline.
+    """
+    while True:
+        i = data.find(marker, pos)
+        if i == -1:
+            return None
+        line_start = data.rfind(b"\n", 0, i) + 1
+        line_end = data.find(b"\n", i)
+        line_end = len(data) if line_end == -1 else line_end + 1
+        if data[line_start:line_end].strip() == marker:
+            return line_start, line_end
+        pos = i + len(marker)
+
+
+def splice_hosts(data, domains):
+    """Return hosts file contents with the managed block section replaced.
+    
+    Existing block sections are located with bytes.find rather than by
+    walking every line; the new block takes the place of the first one.
+    """
+    start = BLOCKER_START_B
+    end = BLOCKER_END_B
+    
+    found = _find_marker_line(data, start)
+    if found is None:
+        prefix, suffix = data, b""
+    else:
+        prefix = data[:found[0]]
+        kept = []
+        while found is not None:
+            end_line = _find_marker_line(data, end, found[1])
+            if end_line is None:
+                break
+            found = _find_marker_line(data, start, end_line[1])
+            kept.append(data[end_line[1]:found[0]] if found is not None else data[end_line[1]:])
+        suffix = b"".join(kept)
+    if prefix and not prefix.endswith(b"\n"):
+        prefix += b"\n"
+    
+    if domains:
+        block = start + b"\n" + _block_body(frozenset(domains)) + b"\n" + end + b"\n"
     else:
-        hours = int(seconds / 3600)
-        minutes = int((seconds % 3600) / 60)
-        if minutes > 0:
-            return f"{hours} hour{'s' if hours != 1 else ''} {minutes} minute{'s' if minutes != 1 else ''}"
-        return f"{hours} hour{'s' if hours != 1 else ''}"
+        block = b""
+    return prefix + block + suffix
+
+
+def replace_file(path, buf, mode):
+    """Atomically replace path with buf.
+    
+    The contents are written to a temporary file beside the original,
+    fsynced and renamed into place so a crash never leaves a half-written
+    file behind.
+    """
+    tmp_path = path + ".tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    try:
+        try:
+            # os.open's mode is filtered through the umask; set it exactly
+            os.fchmod(fd, mode)
+            view = memoryview(buf)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+    except BaseException:
+        # Don't leave a partial temp file beside the original
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
 
 
 def get_concurrent_session_count():
     """Get count of active and pending sessions"""
-    active = db.get_active_sessions()
-    pending = db.get_pending_sessions()
+    active, pending = db.get_live_sessions()
     return len(active) + len(pending)
 
 
@@ -194,8 +254,8 @@ def cmd_profile(config: Config, profile_name: str, targets: list = None):
     if profile.get('all') or 'tags' in profile or 'only' in profile:
         # These profiles create a single session for all domains
         # Check if these domains are already unblocked
-        active_sessions = db.get_active_sessions()
-        pending_sessions = db.get_pending_sessions()
+        active_sessions, pending_sessions = db.get_live_sessions()
+        now = time.time()
         
         active_domains = get_domains_from_sessions(active_sessions)
         pending_domains = get_domains_from_sessions(pending_sessions)
@@ -204,7 +264,7 @@ def cmd_profile(config: Config, profile_name: str, targets: list = None):
         if profile.get('all'):
             for session in active_sessions:
                 if session.get('is_all_domains'):
-                    remaining = session['end_time'] - datetime.now().timestamp()
+                    remaining = session['end_time'] - now
                     prompt_queue_session(
                         f"Already have an active 'all' session (ID: {session['id']})",
                         remaining, domains, timing, profile_name, is_all=True, target_name="all"
@@ -221,13 +281,14 @@ def cmd_profile(config: Config, profile_name: str, targets: list = None):
             if all_active:
                 # Find the session with these domains
                 matching_session = None
+                domains_set = frozenset(domains)
                 for session in active_sessions:
-                    if set(domains).issubset(set(session['domains'])):
+                    if domains_set.issubset(session['domains']):
                         matching_session = session
                         break
                 
                 if matching_session:
-                    remaining = matching_session['end_time'] - datetime.now().timestamp()
+                    remaining = matching_session['end_time'] - now
                     target_desc = f"Domains tagged {', '.join(profile['tags'])}" if 'tags' in profile else f"{', '.join(profile['only'])}"
                     target_name = f"tags:{','.join(profile['tags'])}" if 'tags' in profile else f"only:{','.join(profile['only'][:2])}"
                     prompt_queue_session(target_desc, remaining, domains, timing, profile_name, target_name=target_name)
@@ -263,8 +324,8 @@ def cmd_profile(config: Config, profile_name: str, targets: list = None):
     else:
         # Create separate sessions for each target
         # First, get currently active and pending sessions to check for duplicates
-        active_sessions = db.get_active_sessions()
-        pending_sessions = db.get_pending_sessions()
+        active_sessions, pending_sessions = db.get_live_sessions()
+        now = time.time()
         
         # Build sets of domains that are active vs pending
         active_domains = get_domains_from_sessions(active_sessions)
@@ -287,7 +348,7 @@ def cmd_profile(config: Config, profile_name: str, targets: list = None):
             if any(domain in active_domains for domain in target_domains):
                 active_session = find_session_with_domains(active_sessions, target_domains)
                 if active_session:
-                    remaining = active_session['end_time'] - datetime.now().timestamp()
+                    remaining = active_session['end_time'] - now
                     if prompt_queue_session(target, remaining, target_domains, timing, profile_name, target_name=target):
                         new_session_count += 1
                     else:
@@ -332,9 +393,9 @@ def cmd_profile(config: Config, profile_name: str, targets: list = None):
 
 def cmd_status(config: Config, args):
     """Show current status."""
-    active_sessions = db.get_active_sessions()
-    pending_sessions = db.get_pending_sessions()
+    active_sessions, pending_sessions = db.get_live_sessions()
     queued_sessions = db.get_queued_sessions()
+    now = time.time()
     
     if not active_sessions and not pending_sessions and not queued_sessions:
         print("All domains are blocked")
@@ -354,7 +415,7 @@ def cmd_status(config: Config, args):
         print("PENDING SESSIONS:")
         for session in pending_sessions:
             print_session_info(session)
-            wait_remaining = session['wait_until'] - datetime.now().timestamp()
+            wait_remaining = session['wait_until'] - now
             print(f"    Starts in: {format_time_remaining(wait_remaining)}")
             print(f"    Duration: {format_time_remaining(session['end_time'] - session['wait_until'])}")
         print()
@@ -363,12 +424,12 @@ def cmd_status(config: Config, args):
         print("ACTIVE SESSIONS:")
         for session in active_sessions:
             print_session_info(session)
-            remaining = session['end_time'] - datetime.now().timestamp()
+            remaining = session['end_time'] - now
             print(f"    Remaining: {format_time_remaining(remaining)}")
         print()
         
         all_unblocked = db.get_all_unblocked_domains()
-        print(f"Currently unblocked: {', '.join(sorted(all_unblocked)[:10])}" +
+        print(f"Currently unblocked: {', '.join(all_unblocked[:10])}" +
               (" (and more)" if len(all_unblocked) > 10 else ""))
     
     # Check cooldowns for profiles
@@ -418,12 +479,10 @@ def cmd_cancel(config, args):
             print(f"Cancelled session {session_id}")
         except ValueError:
             # Cancel by target name
-            active = db.get_active_sessions()
-            pending = db.get_pending_sessions()
-            all_sessions = active + pending
+            active, pending = db.get_live_sessions()
             
             # Try to find a session matching the target
-            session = find_session_by_target(args.target, all_sessions)
+            session = find_session_by_target(args.target, chain(active, pending))
             
             if not session:
                 print(f"No session found for '{args.target}'")
@@ -433,24 +492,20 @@ def cmd_cancel(config, args):
             print(f"Cancelled session {session['id']} for {args.target}")
     else:
         # Cancel all
-        active = db.get_active_sessions()
-        pending = db.get_pending_sessions()
-        all_sessions = active + pending
+        active, pending = db.get_live_sessions()
         
-        if not all_sessions:
+        if not active and not pending:
             print("No sessions to cancel")
             return
         
-        for session in all_sessions:
-            db.cancel_session(session['id'])
+        db.cancel_sessions([session['id'] for session in chain(active, pending)])
         
-        print(f"Cancelled {len(all_sessions)} session(s)")
+        print(f"Cancelled {len(active) + len(pending)} session(s)")
 
 
 def cmd_replace(config, args):
     """Replace a pending session with new targets."""
-    pending_sessions = db.get_pending_sessions()
-    active_sessions = db.get_active_sessions()
+    active_sessions, pending_sessions = db.get_live_sessions()
     
     # Handle different ways to identify the session to replace
     session_to_replace = None
@@ -504,7 +559,7 @@ def cmd_replace(config, args):
         sys.exit(1)
     
     # Calculate wait time from original session
-    original_wait_remaining = session_to_replace['wait_until'] - datetime.now().timestamp()
+    original_wait_remaining = session_to_replace['wait_until'] - time.time()
     wait_minutes = max(0, original_wait_remaining / 60)  # Keep original wait time
     duration = session_to_replace['end_time'] - session_to_replace['wait_until']
     duration_minutes = duration / 60
@@ -1,11 +1,13 @@
 """Test taviblock commands with minimal mocking"""
 
 import pytest
+import os
 import sys
 from io import StringIO
 from contextlib import contextmanager
 from cli import db
 import cli.taviblock as taviblock
+from cli import common
 
 
 @contextmanager
@@ -32,6 +34,107 @@ class TestCommands:
         assert taviblock.format_time_remaining(3660) == "1 hour 1 minute"
         assert taviblock.format_time_remaining(7200) == "2 hours"
     
+    def test_generate_block_entries_packs_hosts(self):
+        """Test that hostnames are packed several to a line"""
+        entries = common.generate_block_entries(['example.com', 'sub.example.org'])
+        
+        # example.com plus its six subdomains, then sub.example.org
+        assert entries == [
+            "127.0.0.1 example.com www.example.com m.example.com mobile.example.com "
+            "login.example.com app.example.com api.example.com sub.example.org",
+            "::1 example.com www.example.com m.example.com mobile.example.com "
+            "login.example.com app.example.com api.example.com sub.example.org",
+        ]
+        assert all(len(line.split()) - 1 <= common.HOSTS_PER_LINE for line in entries)
+    
+    def test_url_matches_domains(self):
+        """Test matching a URL's host against blocked domains and their subdomains"""
+        domains = frozenset(['slack.com', 'news.example.org'])
+        
+        assert common.url_matches_domains('https://slack.com/', domains)
+        assert common.url_matches_domains('https://WWW.Slack.com:443/x', domains)
+        assert common.url_matches_domains('https://app.slack.com/client', domains)
+        assert common.url_matches_domains('http://a.news.example.org', domains)
+        assert not common.url_matches_domains('https://example.org/', domains)
+        assert not common.url_matches_domains('https://slack.com.evil.net/', domains)
+        assert not common.url_matches_domains('https://notslack.com/', domains)
+        assert not common.url_matches_domains('https://x.net/?next=https://slack.com', domains)
+        assert not common.url_matches_domains('', domains)
+    
+    def test_splice_hosts(self):
+        """Test replacing the managed hosts section"""
+        data = (
+            b"127.0.0.1 localhost\n"
+            + taviblock.BLOCKER_START_B + b"\n127.0.0.1 stale.com\n" + taviblock.BLOCKER_END_B + b"\n"
+            + b"127.0.0.1 after.local\n"
+        )
+        
+        content = taviblock.splice_hosts(data, ['example.com'])
+        
+        assert content.startswith(b"127.0.0.1 localhost\n")
+        assert content.endswith(b"127.0.0.1 after.local\n")
+        assert b'stale.com' not in content
+        assert b'127.0.0.1 example.com' in content
+        assert content.count(taviblock.BLOCKER_START_B) == 1
+        
+        # Same block set reproduces the same bytes
+        assert taviblock.splice_hosts(content, ['example.com']) == content
+        
+        assert taviblock.splice_hosts(content, []) == b"127.0.0.1 localhost\n127.0.0.1 after.local\n"
+    
+    def test_splice_hosts_strips_every_block(self):
+        """Test that leftover duplicate block sections are all removed"""
+        stale = taviblock.BLOCKER_START_B + b"\n127.0.0.1 stale.com\n" + taviblock.BLOCKER_END_B + b"\n"
+        data = b"127.0.0.1 localhost\n" + stale + b"127.0.0.1 mid.local\n" + stale
+        
+        content = taviblock.splice_hosts(data, ['example.com'])
+        
+        assert b'stale.com' not in content
+        assert content.count(taviblock.BLOCKER_START_B) == 1
+        assert content.endswith(taviblock.BLOCKER_END_B + b"\n127.0.0.1 mid.local\n")
+    
+    def test_splice_hosts_matches_whole_marker_lines(self):
+        """Test that markers only count when they make up the whole line"""
+        start, end = taviblock.BLOCKER_START_B, taviblock.BLOCKER_END_B
+        comment = b"# sections begin at " + start + b"\n"
+        entry = b"127.0.0.1 keep.local " + end + b"\n"
+        data = comment + entry + b"  " + start + b"\r\n127.0.0.1 stale.com\n" + end
+        
+        content = taviblock.splice_hosts(data, ['example.com'])
+        
+        assert content.startswith(comment + entry + start + b"\n")
+        assert b'stale.com' not in content
+        assert content.endswith(end + b"\n")
+        assert taviblock.splice_hosts(content, []) == comment + entry
+    
+    def test_replace_file(self, tmp_path):
+        """Test atomic replacement keeps the given mode and cleans up on failure"""
+        hosts = tmp_path / 'hosts'
+        hosts.write_bytes(b"old\n")
+        
+        taviblock.replace_file(str(hosts), b"new\n", 0o644)
+        
+        assert hosts.read_bytes() == b"new\n"
+        assert taviblock.read_hosts(str(hosts)) == (b"new\n", 0o644)
+        assert not (tmp_path / 'hosts.tmp').exists()
+        
+        # Group-writable modes survive a restrictive umask
+        old_umask = os.umask(0o022)
+        try:
+            taviblock.replace_file(str(hosts), b"shared\n", 0o664)
+        finally:
+            os.umask(old_umask)
+        assert taviblock.read_hosts(str(hosts)) == (b"shared\n", 0o664)
+        
+        # A failed rename leaves the target and no temp file behind
+        target = tmp_path / 'dir'
+        target.mkdir()
+        (target / 'child').write_text("x")
+        with pytest.raises(OSError):
+            taviblock.replace_file(str(target), b"x", 0o644)
+        assert (target / 'child').read_text() == "x"
+        assert not (tmp_path / 'dir.tmp').exists()
+    
     def test_find_session_by_target(self, clean_sessions):
         """Test finding sessions by target name"""
         # Create some sessions
@@ -1,6 +1,8 @@
 """Test configuration loading and validation"""
 
+import os
 import pytest
+from cli import config_loader
 from cli.config_loader import Config
 
 
@@ -46,6 +48,17 @@ class TestConfigLoader:
         assert len(domains) == 2
         assert 'group' in tags
     
+    def test_resolve_targets_cached_copies(self, test_config):
+        """Test that cached results can't be mutated by callers"""
+        domains, tags = test_config.resolve_targets(['testgroup'])
+        domains.append('mutated.com')
+        tags.add('mutated')
+        
+        domains, tags = test_config.resolve_targets([' testgroup '])
+        
+        assert sorted(domains) == ['group1.com', 'group2.com']
+        assert 'mutated' not in tags
+    
     def test_resolve_targets_invalid_raises(self, test_config):
         """Test that invalid targets raise ValueError"""
         with pytest.raises(ValueError) as exc_info:
@@ -93,4 +106,16 @@ class TestConfigLoader:
         assert 'unblock' in profiles
         assert 'quick' in profiles
         assert 'testwork' in profiles
-        assert 'testall' in profiles
\ No newline at end of file
+        assert 'testall' in profiles
+    
+    def test_config_cache_keeps_one_entry_per_file(self, tmp_path):
+        """Test that editing a config replaces its cached parse"""
+        path = tmp_path / 'config.yaml'
+        path.write_text("domains:\n  a.com: {}\nprofiles: {}\n")
+        assert Config(str(path)).get_all_domains() == ['a.com']
+        
+        path.write_text("domains:\n  b.com: {}\n  c.com: {}\nprofiles: {}\n")
+        assert sorted(Config(str(path)).get_all_domains()) == ['b.com', 'c.com']
+        
+        real_path = os.path.realpath(str(path))
+        assert sum(key == real_path for key in config_loader._CONFIG_CACHE) == 1
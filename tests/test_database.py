@@ -1,5 +1,7 @@
 """Test database operations"""
 
+import sqlite3
+import time
 import pytest
 from datetime import datetime
 from cli import db
@@ -41,6 +43,26 @@ class TestDatabase:
         assert len(active) == 1
         assert active[0]['domains'] == ['active.com']
     
+    def test_queued_session_not_active(self, clean_sessions):
+        """Test that a queued session stays out of the live lookups until activated"""
+        session_id = db.add_unblock_session(['queued.com'], 30, 0, 'unblock',
+                                            queued_for_domains=['queued.com'])
+        
+        # Its wait has already elapsed, but it is still only queued
+        assert db.get_active_sessions() == []
+        assert db.get_live_sessions() == ([], [])
+        assert db.clean_and_fetch_active() == []
+        assert db.get_all_unblocked_domains() == []
+        assert db.find_session_by_domains(['queued.com']) is None
+        assert len(db.get_queued_sessions()) == 1
+        
+        db.activate_queued_session(session_id, 0)
+        
+        assert [s['id'] for s in db.get_active_sessions()] == [session_id]
+        assert db.get_all_unblocked_domains() == ['queued.com']
+        assert db.find_session_by_domains(['queued.com'])['id'] == session_id
+        assert db.get_queued_sessions() == []
+    
     def test_get_pending_sessions(self, clean_sessions):
         """Test getting pending sessions"""
         # Add an active session (no wait)
@@ -54,6 +76,47 @@ class TestDatabase:
         assert len(pending) == 1
         assert pending[0]['domains'] == ['pending.com']
     
+    def test_get_live_sessions(self, clean_sessions):
+        """Test getting active and pending sessions in one call"""
+        db.add_unblock_session(['active.com'], 30, 0, 'unblock')
+        db.add_unblock_session(['pending.com'], 30, 5, 'unblock')
+        db.add_unblock_session(['queued.com'], 30, 5, 'unblock', queued_for_domains=['active.com'])
+        
+        active, pending = db.get_live_sessions()
+        
+        assert active == db.get_active_sessions()
+        assert pending == db.get_pending_sessions()
+        assert [s['domains'] for s in active] == [['active.com']]
+        assert [s['domains'] for s in pending] == [['pending.com']]
+    
+    def test_clean_and_fetch_active(self, clean_sessions):
+        """Test cleaning expired sessions and fetching active ones together"""
+        expired_id = db.add_unblock_session(['expired.com'], -1, 0, 'unblock')
+        db.add_unblock_session(['active.com'], 30, 0, 'unblock')
+        db.add_unblock_session(['pending.com'], 30, 5, 'unblock')
+        
+        active = db.clean_and_fetch_active()
+        
+        assert [s['domains'] for s in active] == [['active.com']]
+        assert set(active[0]) == {'id', 'domains', 'end_time', 'wait_until', 'session_type'}
+        assert db.get_session_info(expired_id) is None
+        assert db.get_all_unblocked_domains(active) == ['active.com']
+    
+    def test_get_next_deadline(self, clean_sessions):
+        """Test finding the next session boundary"""
+        assert db.get_next_deadline() is None
+        
+        active_id = db.add_unblock_session(['active.com'], 30, 0, 'unblock')
+        pending_id = db.add_unblock_session(['pending.com'], 30, 5, 'unblock')
+        active = db.get_session_info(active_id)
+        pending = db.get_session_info(pending_id)
+        
+        # The pending session starts before the active one's end warning
+        assert db.get_next_deadline() == pending['wait_until']
+        
+        db.cancel_session(pending_id)
+        assert db.get_next_deadline(notify_lead=65) == active['end_time'] - 65
+    
     def test_cancel_session(self, clean_sessions):
         """Test canceling a session"""
         session_id = db.add_unblock_session(['cancel.com'], 30, 0, 'unblock')
@@ -67,6 +130,41 @@ class TestDatabase:
         # Verify it's gone
         assert db.get_session_info(session_id) is None
     
+    def test_cancel_sessions(self, clean_sessions):
+        """Test canceling several sessions at once"""
+        first_id = db.add_unblock_session(['one.com'], 30, 0, 'unblock')
+        second_id = db.add_unblock_session(['two.com'], 30, 5, 'unblock')
+        kept_id = db.add_unblock_session(['kept.com'], 30, 0, 'unblock')
+        
+        db.cancel_sessions([first_id, second_id])
+        
+        assert db.get_session_info(first_id) is None
+        assert db.get_session_info(second_id) is None
+        assert db.get_session_info(kept_id) is not None
+    
+    def test_find_session_by_domains(self, clean_sessions):
+        """Test looking up a session by its domain set"""
+        session_id = db.add_unblock_session(['b.com', 'a.com'], 30, 0, 'unblock')
+        db.add_unblock_session(['a.com', 'b.com'], 30, 0, 'bypass')
+        
+        session = db.find_session_by_domains({'a.com', 'b.com'})
+        
+        assert session is not None
+        assert session['id'] == session_id
+        assert db.find_session_by_domains(['a.com']) is None
+    
+    def test_find_session_by_domains_ignores_hash_collisions(self, clean_sessions):
+        """Test that a session sharing only the hash is not returned"""
+        other_id = db.add_unblock_session(['other.com'], 30, 0, 'unblock')
+        # Simulate a digest collision with the requested domain set
+        db.get_connection().execute("UPDATE unblock_sessions SET domains_hash = ? WHERE id = ?",
+                                    (db.domains_hash(['a.com']), other_id))
+        
+        assert db.find_session_by_domains(['a.com']) is None
+        
+        session_id = db.add_unblock_session(['a.com'], 30, 0, 'unblock')
+        assert db.find_session_by_domains(['a.com'])['id'] == session_id
+    
     def test_get_all_unblocked_domains(self, clean_sessions):
         """Test getting all unblocked domains"""
         # Add multiple active sessions
@@ -83,6 +181,89 @@ class TestDatabase:
         assert 'domain3.com' in unblocked
         assert 'pending.com' not in unblocked
         assert len(unblocked) == 3
+        assert unblocked == sorted(unblocked)
+    
+    def test_decode_domains_returns_fresh_lists(self):
+        """Test that cached domain decoding never hands out shared lists"""
+        first = db.decode_domains('["a.com", "b.com"]')
+        first.append('c.com')
+        
+        assert db.decode_domains('["a.com", "b.com"]') == ['a.com', 'b.com']
+    
+    def test_daily_stats_refresh_after_writes(self, clean_sessions):
+        """Test that memoized daily stats pick up sessions added since"""
+        from cli import penalty
+        
+        assert penalty.get_daily_stats()['count'] == 0
+        db.add_unblock_session(['a.com'], 30, 0, 'unblock')
+        assert penalty.get_daily_stats()['count'] == 1
+    
+    def test_daily_stats_refresh_after_other_connection_writes(self, clean_sessions):
+        """Test that memoized daily stats pick up sessions another process added"""
+        from cli import penalty
+        
+        assert penalty.get_daily_stats()['count'] == 0
+        
+        # A second connection stands in for the daemon or another CLI run
+        other = sqlite3.connect(str(db.DB_PATH))
+        now = time.time()
+        with other:
+            other.execute("""
+                INSERT INTO unblock_sessions (domains, start_time, end_time, wait_until, session_type, created_at)
+                VALUES ('["a.com"]', ?, ?, ?, 'unblock', ?)
+            """, (now, now + 60, now, now))
+        other.close()
+        
+        assert penalty.get_daily_stats()['count'] == 1
+    
+    def test_init_db_migrates_legacy_schema(self, tmp_path):
+        """Test that init_db upgrades a table created before the migrated columns"""
+        import sqlite3
+        
+        db_path = str(tmp_path / 'legacy.db')
+        legacy = sqlite3.connect(db_path)
+        legacy.execute("""
+            CREATE TABLE unblock_sessions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                domains TEXT NOT NULL,
+                start_time REAL NOT NULL,
+                end_time REAL NOT NULL,
+                wait_until REAL,
+                session_type TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        legacy.execute("""
+            INSERT INTO unblock_sessions (domains, start_time, end_time, wait_until, session_type, created_at)
+            VALUES ('["old.com"]', 0, 9e12, 0, 'unblock', 0)
+        """)
+        legacy.commit()
+        legacy.close()
+        
+        original_db_path = db.DB_PATH
+        db.DB_PATH = db_path
+        try:
+            db.init_db()
+            conn = db.get_connection()
+            indexes = {row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'unblock_sessions'")}
+            assert {'idx_sessions_end_wait', 'idx_sessions_wait_until', 'idx_sessions_queued',
+                    'idx_sessions_domains_hash', 'idx_sessions_daily'} <= indexes
+            assert db.get_all_unblocked_domains() == ['old.com']
+        finally:
+            db.close_connection()
+            db.DB_PATH = original_db_path
+    
+    def test_session_domains_follow_session(self, clean_sessions):
+        """Test that session_domains rows are added and removed with their session"""
+        session_id = db.add_unblock_session(['a.com', 'b.com', 'a.com'], 30, 0, 'unblock')
+        conn = db.get_connection()
+        count = "SELECT COUNT(*) FROM session_domains WHERE session_id = ?"
+        assert conn.execute(count, (session_id,)).fetchone()[0] == 2
+        
+        db.cancel_session(session_id)
+        assert conn.execute(count, (session_id,)).fetchone()[0] == 0
+        assert db.get_all_unblocked_domains() == []
     
     def test_session_timing(self, clean_sessions):
         """Test that session timing is calculated correctly"""